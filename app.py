@@ -3,32 +3,329 @@ Application Flask du système de notification
 Utilise TES classes core/
 """
 
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import (Flask, Response, render_template, request, jsonify, flash, redirect, url_for,
+                   stream_with_context, make_response, session)
+from markupsafe import Markup
+import hashlib
 import json
-from datetime import datetime
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
 
-# Importe TES classes
-from core.alert_types import SecurityAlert, WeatherAlert, HealthAlert, AcademicAlert
+# Importe TES classes (l'import enregistre les types d'alerte dans la métaclasse)
+from core.alert_types import SecurityAlert, WeatherAlert
 from core.notifiers import EmergencyNotifier
 from core.advanced import NotificationMeta, UserNotification
+from core.stats import StatsAggregator
+from core.history import HistoryStore, decode_cursor, encode_cursor
+from core.jobs import JobQueue, QueueFullError, SQLiteJobBackend
+from core.logs import configure_logging, get_logger
+from core.retry import get_scheduler
+from core.delivery import get_pipeline
+from core.pubsub import format_event, get_hub
+from core.dedup import COALESCE, Deduplicator
+from core.audience import Audience, UserDirectory, get_directory, set_directory
+from core.ratelimit import DEFAULT_API_LIMIT, KeyedLimiter, parse_rate
+from core.metrics import get_registry
+from core.cache import LRUCache
+from core.digest import DIGEST_QUEUED, QUEUED_RESULT, get_digester
+from core.timers import SQLiteScheduleStore, SendScheduler
+
+configure_logging()  # LOG_LEVEL / LOG_FORMAT=json
+logger = get_logger("app")
 
 app = Flask(__name__)
 app.secret_key = 'secret-key-123'  # Pour les messages flash
 
-# Données en mémoire (pour la simplicité)
-notifications_history = []
+# Historique : mémoire partagée si HISTORY_BACKEND=shm, SQLite persistant si DATABASE_URL est défini, sinon en mémoire
+stats = StatsAggregator()  # Compteurs tenus à jour à chaque envoi
+if os.environ.get('HISTORY_BACKEND') == 'shm':
+    # Plusieurs workers (gunicorn) sur une machine : historique et statistiques partagés
+    from core.shm import open_shared
+    notifications_history, stats = open_shared(os.environ.get('SHM_PATH'),
+                                               int(os.environ.get('HISTORY_CAPACITY', 1000)))
+elif os.environ.get('DATABASE_URL'):
+    from models import db, SQLHistoryStore
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL']
+    db.init_app(app)
+    notifications_history = SQLHistoryStore(app)
+    stats.restore(notifications_history.counts())
+else:
+    notifications_history = HistoryStore(
+        capacity=int(os.environ.get('HISTORY_CAPACITY', 1000))  # Buffer circulaire borné
+    )
+
+# Envois programmés : persistés dans instance/scheduled.db (un même fichier partagé par
+# tous les workers gunicorn) ; SCHEDULE_DB pour un autre chemin, ':memory:' pour les tests
+SCHEDULE_DB = os.environ.get('SCHEDULE_DB') or os.path.join(app.instance_path, 'scheduled.db')
+if SCHEDULE_DB != ':memory:':
+    os.makedirs(os.path.dirname(os.path.abspath(SCHEDULE_DB)), exist_ok=True)
+    logger.info("Envois programmés persistés dans %s", SCHEDULE_DB)
+
 users = {
     'admin': {'password': 'admin123', 'name': 'Administrateur'},
     'etudiant': {'password': 'etu123', 'name': 'Étudiant Test'}
 }
 
+# Annuaire des destinataires (ciblage par audience) : USERS_CSV, sinon les comptes de démo
+if os.environ.get('USERS_CSV'):
+    set_directory(UserDirectory.from_csv(os.environ['USERS_CSV']))
+else:
+    for login, user in users.items():
+        get_directory().add(user['name'], email=f"{login}@campus.edu", groups=(login,),
+                            role='staff' if login == 'admin' else 'student')
+
+# Rendu conditionnel : une page n'est rendue que si ses données ont changé
+# fragments : blocs rendus (dernières notifications, statistiques) par version des données
+fragments = LRUCache(maxsize=int(os.environ.get('FRAGMENT_CACHE_SIZE', 64)))
+page_versions = {}  # page -> (ETag, date du changement) : en-tête Last-Modified
+
+def render_fragment(template, version, load):
+    """Fragment HTML rendu une fois par version ; load() fournit le contexte (lu seulement si absent)"""
+    return Markup(fragments.get_or_set((template, version),
+                                       lambda: render_template(template, **load())))
+
+def conditional_page(page, parts, render):
+    """
+    ETag = empreinte des données affichées (parts) ; Last-Modified = dernier changement d'ETag
+    parts commence par la version de l'historique, partagée entre workers (base SQL ou segment
+    shm) : un worker voit les changements faits par les autres
+    304 sans rendu si le client a déjà cette version (If-None-Match, sinon If-Modified-Since)
+    Les messages flash en attente forcent le rendu : une réponse 304 les garderait en session
+    """
+    etag = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    known = page_versions.get(page)
+    if known is None or known[0] != etag:
+        known = page_versions[page] = (etag, datetime.fromtimestamp(int(time.time()), timezone.utc))
+    last_modified = known[1]
+    if '_flashes' in session:
+        fresh = False
+    elif request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        fresh = request.if_modified_since is not None and request.if_modified_since >= last_modified
+    response = Response(status=304) if fresh else make_response(render())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True  # Toujours revalider (rafraîchissement automatique)
+    return response
+
 # Page d'accueil
 @app.route('/')
 def index():
-    """Page d'accueil"""
-    return render_template('index.html', 
-                         notifications=notifications_history[-5:],  # 5 dernières
-                         total=len(notifications_history))
+    """Page d'accueil (304 tant qu'aucune notification n'est arrivée)"""
+    version = notifications_history.version
+    return conditional_page('index', (version, stats.total), lambda: render_template(
+        'index.html',
+        notifications_html=render_fragment('fragments/index_notifications.html', version,
+                                           lambda: {'notifications': notifications_history.latest(5)}),
+        total=stats.total))
+
+# Table de dispatch partagée par les routes : code -> AlertSpec (classe, priorité, icône, canaux)
+# Construite par la métaclasse à la définition des classes d'alerte
+ALERT_DISPATCH = NotificationMeta.get_alert_types()
+BATCH_MAX_ITEMS = 10000  # Éléments max par requête /api/send/batch
+BATCH_JOB_SIZE = 500     # Éléments max par job (les groupes sont découpés)
+PAGE_MAX_SIZE = 100000   # Lignes max par page /api/notifications (export)
+STREAM_KEEPALIVE = 15.0  # Secondes entre deux commentaires SSE sur un flux inactif
+LIVE_NOTIFICATIONS = 10  # Notifications poussées au dashboard par job
+COALESCE_ATTEMPTS = 5    # Mises en file d'un envoi regroupé (file pleine : nouvel essai après Retry-After)
+
+# Diffusion en direct : les jobs publient, /api/stream relaie aux dashboards
+# live_lock rend atomiques (stats + delta publié) et (abonnement + photo des stats)
+hub = get_hub()
+live_lock = threading.Lock()
+
+# Traitement d'une notification (exécuté par un worker de la file de jobs)
+def process_notification(job):
+    """
+    Envoie l'alerte (ou le lot d'alertes du même type), attend les canaux
+    et enregistre dans l'historique
+    """
+    alert_type = job.payload['type']
+    messages = job.payload.get('messages') or [job.payload['message']]
+    spec = ALERT_DISPATCH.get(alert_type)
+    if spec is None:
+        raise ValueError(f"Type d'alerte invalide: {alert_type}")
+    audience = Audience.from_dict(job.payload['audience']) if job.payload.get('audience') else None
+    
+    # Tous les envois partent avant la première attente : le pipeline les regroupe
+    sent = []
+    for message in messages:
+        alert = spec.cls(message, job.payload.get('locale'))
+        sent.append((alert, alert.send(audience)))
+    
+    job.progress = {'done': 0, 'total': len(sent)}
+    records = []
+    for alert, result in sent:
+        # Pas de délai : les limites de débit peuvent différer la livraison, et chaque
+        # Future finit par aboutir (envoi, échec après réessais ou file pleine)
+        outcomes = result.wait()
+        job.progress['done'] += 1
+        if outcomes and all(outcome == DIGEST_QUEUED for outcome in outcomes):
+            result = QUEUED_RESULT  # Pas encore livrée : partira dans un résumé
+        
+        # Sauvegarde dans l'historique
+        records.append(notifications_history.append(alert_type, alert.message, spec.priority, spec.icon, result))
+    
+    # Un seul delta de statistiques par job, appliqué tel quel par les dashboards
+    count = len(records)
+    with live_lock:
+        stats.record(alert_type, spec.priority, count=count)
+        hub.publish('stats', {'total': count, alert_type.lower(): count, spec.priority.lower(): count})
+    hub.publish('notifications', [record.to_dict() for record in records[-LIVE_NOTIFICATIONS:]])
+    
+    if len(sent) == 1:
+        return result  # Résumé de l'envoi, ou QUEUED_RESULT si mis en attente
+    return f"{len(sent)} alertes {alert_type} envoyées"
+
+def job_priority(payload):
+    """Priorité du type d'alerte (posée par @priority sur send) : URGENT passe devant LOW"""
+    spec = ALERT_DISPATCH.get(payload.get('type'))
+    return spec.priority if spec else None
+
+if os.environ.get('JOB_BACKEND') == 'sqlite':
+    jobs = JobQueue(process_notification, SQLiteJobBackend(os.environ.get('JOB_DB', 'jobs.db')),
+                    priority=job_priority)
+else:
+    jobs = JobQueue(process_notification, priority=job_priority)
+
+def make_payload(alert_type, audience=None, **fields):
+    """Payload d'un job : message ou messages, audience sérialisée en JSON pour le backend"""
+    payload = {'type': alert_type, **fields}
+    if audience is not None:
+        payload['audience'] = audience.to_dict()
+    return payload
+
+def dispatch_scheduled(due):
+    """
+    Envois programmés échus au même tick : regroupés par (type, audience, langue)
+    en jobs de BATCH_JOB_SIZE messages, comme /api/send/batch ; retourne {id: job_id}
+    File pleine : les envois restants sont absents du résultat (reprogrammés par le scheduler)
+    """
+    groups = {}
+    for entry_id, payload in due:
+        key = (payload['type'], json.dumps(payload.get('audience'), sort_keys=True), payload.get('locale'))
+        groups.setdefault(key, []).append((entry_id, payload))
+    job_ids = {}
+    for (alert_type, _, locale), group in groups.items():
+        for start in range(0, len(group), BATCH_JOB_SIZE):
+            chunk = group[start:start + BATCH_JOB_SIZE]
+            payload = {**chunk[0][1], 'messages': [p['message'] for _, p in chunk]}
+            del payload['message']
+            try:
+                job = jobs.enqueue(payload)
+            except QueueFullError:
+                logger.warning("⏰ File pleine : %d envois programmés %s reportés", len(chunk), alert_type)
+                continue
+            for entry_id, _ in chunk:
+                job_ids[entry_id] = job.id
+    logger.info("⏰ %d envois programmés échus -> %d jobs", len(due), len(set(job_ids.values())))
+    return job_ids
+
+# Envois programmés (send_at / delay), persistés dans SCHEDULE_DB
+scheduler = SendScheduler(dispatch_scheduled, SQLiteScheduleStore(SCHEDULE_DB))
+
+def parse_schedule(send_at, delay):
+    """
+    send_at (epoch ou ISO 8601, heure locale sans fuseau) ou delay (secondes) -> epoch
+    None : envoi immédiat ; ValueError si les deux sont fournis ou si la date est passée
+    """
+    if send_at in (None, '') and delay in (None, ''):
+        return None
+    if send_at not in (None, '') and delay not in (None, ''):
+        raise ValueError('send_at et delay sont exclusifs')
+    if delay not in (None, ''):
+        delay = float(delay)
+        if not (math.isfinite(delay) and delay > 0):
+            raise ValueError('delay doit être un nombre de secondes positif')
+        return time.time() + delay
+    due = parse_time(str(send_at))
+    if not math.isfinite(due):
+        raise ValueError(f'send_at invalide: {send_at}')
+    if due <= time.time():
+        raise ValueError('send_at est dans le passé')
+    return due
+
+def send_coalesced(alert_type, message, repeats, audience=None, attempt=1):
+    """
+    Fin de fenêtre de déduplication : un seul envoi pour toutes les répétitions
+    Appelé sur le thread de l'ordonnanceur : mise en file sans attente, replanifiée si la file est pleine
+    """
+    try:
+        jobs.enqueue(make_payload(alert_type, audience, message=f"{message} (x{repeats})"), block=False)
+    except QueueFullError as e:
+        if attempt < COALESCE_ATTEMPTS:
+            get_scheduler().call_later(e.retry_after, send_coalesced, alert_type, message, repeats, audience,
+                                       attempt + 1)
+        else:
+            logger.warning("[DEDUP] File pleine : envoi regroupé %s (x%d) abandonné", alert_type, repeats)
+
+# Déduplication avant mise en file : DEDUP_MODE = coalesce (défaut) | drop | off
+dedup = Deduplicator(window=float(os.environ.get('DEDUP_WINDOW', 60)),
+                     mode=os.environ.get('DEDUP_MODE', COALESCE),
+                     on_coalesce=send_coalesced)
+
+# Limite par client API (API_RATE_LIMIT, ex: 100/s:2000 ; off pour désactiver)
+api_rate = parse_rate(os.environ.get('API_RATE_LIMIT', DEFAULT_API_LIMIT))
+api_limiter = KeyedLimiter(*api_rate) if api_rate else None
+
+def collect_metrics():
+    """Compteurs existants (canaux, réessais, déduplication, programmés, résumés) exposés sur /metrics"""
+    for channel, state in get_pipeline().channel_states().items():
+        labels = {'channel': channel}
+        yield 'channel_sent_total', 'counter', "Livraisons réussies", labels, state['sent']
+        yield 'channel_failed_total', 'counter', "Livraisons en échec définitif", labels, state['failed']
+        yield 'channel_retries_total', 'counter', "Réessais de livraison", labels, state['retried']
+        yield 'channel_deferred_total', 'counter', "Destinataires différés (plafond)", labels, state['deferred']
+        yield 'channel_throttled_seconds_total', 'counter', "Attente de jetons du fournisseur", labels, state['throttled_seconds']
+        yield 'channel_in_flight', 'gauge', "Appels en cours", labels, state['in_flight']
+        for level, depth in state['queued_by_priority'].items():
+            yield 'channel_queued', 'gauge', "Livraisons en file", {**labels, 'priority': level}, depth
+    retries = get_scheduler().snapshot()
+    yield 'retry_attempts_total', 'counter', "Tentatives (@retry_on_failure)", {}, retries['attempts']
+    yield 'retry_scheduled_total', 'counter', "Réessais planifiés", {}, retries['retries']
+    yield 'retry_dead_letters_total', 'counter', "Appels abandonnés", {}, retries['dead_letters']
+    for alert_type, count in dedup.snapshot()['suppressed_by_type'].items():
+        yield 'dedup_suppressed_total', 'counter', "Doublons supprimés", {'type': alert_type}, count
+    if getattr(notifications_history, 'failed', None) is not None:  # Historique SQL : lots abandonnés
+        yield 'history_write_failures_total', 'counter', "Notifications non enregistrées", {}, notifications_history.failed
+    scheduled = scheduler.snapshot()
+    yield 'scheduled_pending', 'gauge', "Envois programmés en attente", {}, scheduled['pending']
+    yield 'scheduled_dispatched_total', 'counter', "Envois programmés partis", {}, scheduled['dispatched']
+    yield 'scheduled_cancelled_total', 'counter', "Envois programmés annulés", {}, scheduled['cancelled']
+    yield 'scheduled_retried_total', 'counter', "Envois programmés reportés (file pleine)", {}, scheduled['retried']
+    yield 'scheduled_failed_total', 'counter', "Envois programmés abandonnés", {}, scheduled['failed']
+    digester = get_digester()
+    if digester is not None:
+        digest = digester.snapshot()
+        yield 'digest_alerts_total', 'counter', "Alertes mises en résumé", {}, digest['alerts']
+        yield 'digest_deliveries_total', 'counter', "Livraisons de résumés", {}, digest['digests']
+        yield 'digest_pending', 'gauge', "Alertes en attente de résumé", {}, digest['pending']
+
+get_registry().register_collector(collect_metrics)
+
+def client_key():
+    """Client API : en-tête X-API-Key, sinon adresse IP"""
+    return request.headers.get('X-API-Key') or request.remote_addr
+
+def too_many_requests(delay):
+    """Réponse 429 avec Retry-After (secondes entières, arrondi supérieur)"""
+    response = jsonify({'error': 'Trop de requêtes', 'retry_after': round(delay, 3)})
+    response.headers['Retry-After'] = str(math.ceil(delay))
+    return response, 429
+
+def service_unavailable(error):
+    """Réponse 503 avec Retry-After : file de jobs pleine, la charge est délestée"""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(math.ceil(error.retry_after))
+    return response, 503
+
+def duplicate_status():
+    """Statut renvoyé pour une répétition supprimée"""
+    return 'coalesced' if dedup.mode == COALESCE else 'duplicate'
 
 # Page d'envoi
 @app.route('/send', methods=['GET', 'POST'])
@@ -43,61 +340,46 @@ def send_notification():
             flash('Veuillez entrer un message', 'danger')
             return redirect('/send')
         
-        print(f"\n{'='*50}")
-        print(f"📨 NOUVELLE NOTIFICATION")
-        print(f"Type: {alert_type}")
-        print(f"Message: {message}")
-        print('='*50)
+        spec = ALERT_DISPATCH.get(alert_type)
+        if spec is None:
+            flash('Type d\'alerte invalide', 'danger')
+            return redirect('/send')
         
-        result = ""
+        logger.info("📨 NOUVELLE NOTIFICATION type=%s message=%s", alert_type, message,
+                    extra={'alert_type': alert_type})
         
+        # Envoi programmé (champ date/heure du formulaire, ou délai en secondes)
         try:
-            # Utilise TES classes
-            if alert_type == 'SECURITY':
-                alert = SecurityAlert(message)
-                result = alert.send()
-                priority = "URGENT"
-                icon = "🚨"
-                
-            elif alert_type == 'WEATHER':
-                alert = WeatherAlert(message)
-                result = alert.send()
-                priority = "MEDIUM"
-                icon = "🌧️"
-                
-            elif alert_type == 'HEALTH':
-                alert = HealthAlert(message)
-                result = alert.send()
-                priority = "HIGH"
-                icon = "🏥"
-                
-            elif alert_type == 'ACADEMIC':
-                alert = AcademicAlert(message)
-                result = alert.send()
-                priority = "LOW"
-                icon = "📚"
-                
+            due = parse_schedule(request.form.get('send_at'), request.form.get('delay'))
+            entry_id = scheduler.schedule({'type': alert_type, 'message': message}, due) if due is not None else None
+        except ValueError as e:
+            flash(f'Programmation invalide : {e}', 'danger')
+            return redirect('/send')
+        if entry_id is not None:
+            when = datetime.fromtimestamp(due).strftime('%d/%m/%Y %H:%M')
+            flash(f'Notification programmée pour le {when}', 'success')
+            result = f"Envoi {entry_id} programmé — annulation : DELETE /api/scheduled/{entry_id}"
+            return render_template('send.html', result=result), 202
+        
+        duplicate = dedup.check(alert_type, message)
+        if duplicate is not None:
+            if dedup.mode == COALESCE:
+                flash(f'Notification identique déjà envoyée : répétition regroupée (x{duplicate.repeats})', 'info')
             else:
-                flash('Type d\'alerte invalide', 'danger')
-                return redirect('/send')
-            
-            # Sauvegarde dans l'historique
-            notifications_history.append({
-                'type': alert_type,
-                'message': message,
-                'priority': priority,
-                'icon': icon,
-                'timestamp': datetime.now().strftime('%H:%M:%S'),
-                'result': result
-            })
-            
-            flash(f'{icon} Notification envoyée avec succès!', 'success')
-            
-        except Exception as e:
-            flash(f'Erreur: {str(e)}', 'danger')
-            result = f"Erreur: {str(e)}"
-        
-        return render_template('send.html', result=result)
+                flash('Notification identique déjà envoyée : répétition ignorée', 'info')
+            return render_template('send.html')
+        
+        # Mise en file : la livraison se fait en arrière-plan
+        try:
+            job = jobs.enqueue({'type': alert_type, 'message': message})
+        except QueueFullError as e:
+            dedup.release(alert_type, message)  # Le nouvel essai ne doit pas passer pour un doublon
+            flash('Trop de notifications en attente, réessayez dans quelques instants', 'danger')
+            return render_template('send.html'), 503, {'Retry-After': str(math.ceil(e.retry_after))}
+        flash(spec.queued_message.format(job_id=job.id), 'success')
+        result = f"Job {job.id} en cours — suivi : /api/jobs/{job.id}"
+        
+        return render_template('send.html', result=result), 202
     
     return render_template('send.html')
 
@@ -106,19 +388,6 @@ def send_notification():
 def dashboard():
     """Dashboard avec statistiques"""
     
-    # Calcule les statistiques
-    stats = {
-        'total': len(notifications_history),
-        'security': sum(1 for n in notifications_history if n['type'] == 'SECURITY'),
-        'weather': sum(1 for n in notifications_history if n['type'] == 'WEATHER'),
-        'health': sum(1 for n in notifications_history if n['type'] == 'HEALTH'),
-        'academic': sum(1 for n in notifications_history if n['type'] == 'ACADEMIC'),
-        'urgent': sum(1 for n in notifications_history if n['priority'] == 'URGENT'),
-        'high': sum(1 for n in notifications_history if n['priority'] == 'HIGH'),
-        'medium': sum(1 for n in notifications_history if n['priority'] == 'MEDIUM'),
-        'low': sum(1 for n in notifications_history if n['priority'] == 'LOW'),
-    }
-    
     # Récupère le MRO pour la démo
     mro_list = []
     try:
@@ -127,10 +396,19 @@ def dashboard():
     except:
         mro_list = ["MRO non disponible"]
     
-    return render_template('dashboard.html', 
-                         stats=stats,
-                         mro=mro_list,
-                         notifications=notifications_history[-10:])
+    version = notifications_history.version
+    summary = stats.snapshot()  # Statistiques précalculées ; le total sert de version
+    channels = get_pipeline().channel_states()
+    dedup_state = dedup.snapshot()
+    return conditional_page('dashboard', (version, summary['total'], channels, dedup_state), lambda: render_template(
+        'dashboard.html',
+        stats_html=render_fragment('fragments/dashboard_stats.html', summary['total'],
+                                   lambda: {'stats': summary}),
+        channels=channels,
+        dedup=dedup_state,
+        mro=mro_list,
+        notifications_html=render_fragment('fragments/dashboard_notifications.html', version,
+                                           lambda: {'notifications': notifications_history.latest(10)})))
 
 # Page de démonstration POO
 @app.route('/demo-poo')
@@ -181,6 +459,10 @@ def demo_poo():
 @app.route('/api/send', methods=['POST'])
 def api_send():
     """API pour envoyer des notifications (JSON)"""
+    if api_limiter is not None:
+        delay = api_limiter.try_acquire(client_key())
+        if delay:
+            return too_many_requests(delay)
     try:
         data = request.get_json()
         alert_type = data.get('type')
@@ -189,25 +471,302 @@ def api_send():
         if not alert_type or not message:
             return jsonify({'error': 'Type et message requis'}), 400
         
-        # Utilise TES classes
-        if alert_type == 'SECURITY':
-            alert = SecurityAlert(message)
-            result = alert.send()
-        elif alert_type == 'WEATHER':
-            alert = WeatherAlert(message)
-            result = alert.send()
-        else:
+        if alert_type not in ALERT_DISPATCH:
             return jsonify({'error': 'Type non supporté'}), 400
         
+        # Ciblage optionnel : {"groups": [...], "buildings": [...], "roles": [...]}
+        try:
+            audience = Audience.from_dict(data['audience']) if data.get('audience') is not None else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Langue des gabarits (ex: "en") ; défaut NOTIFICATION_LOCALE, repli sur le français
+        fields = {'message': message}
+        if data.get('locale') is not None:
+            if not isinstance(data['locale'], str):
+                return jsonify({'error': 'locale doit être une chaîne'}), 400
+            fields['locale'] = data['locale']
+        
+        # Envoi programmé : send_at (epoch ou ISO 8601) ou delay (secondes)
+        # La déduplication vise les rafales immédiates : un envoi programmé n'y passe pas
+        try:
+            due = parse_schedule(data.get('send_at'), data.get('delay'))
+            if due is not None:
+                entry_id = scheduler.schedule(make_payload(alert_type, audience, **fields), due)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        if due is not None:
+            return jsonify({
+                'status': 'scheduled',
+                'scheduled_id': entry_id,
+                'send_at': datetime.fromtimestamp(due).isoformat(),
+                'status_url': url_for('api_scheduled', entry_id=entry_id),
+                'timestamp': datetime.now().isoformat()
+            }), 202
+        
+        duplicate = dedup.check(alert_type, message, audience)
+        if duplicate is not None:
+            return jsonify({
+                'status': duplicate_status(),
+                'repeats': duplicate.repeats,
+                'timestamp': datetime.now().isoformat()
+            }), 200
+        
+        try:
+            job = jobs.enqueue(make_payload(alert_type, audience, **fields))
+        except QueueFullError as e:
+            dedup.release(alert_type, message, audience)  # Le nouvel essai ne doit pas passer pour un doublon
+            return service_unavailable(e)
+        
         return jsonify({
-            'status': 'success',
-            'result': result,
+            'status': 'accepted',
+            'job_id': job.id,
+            'status_url': url_for('api_job', job_id=job.id),
             'timestamp': datetime.now().isoformat()
-        })
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# API d'envoi en masse
+@app.route('/api/send/batch', methods=['POST'])
+def api_send_batch():
+    """
+    Envoi en masse : tableau JSON ou flux NDJSON de {type, message, audience?}
+    Validation en une passe, regroupement par (type, audience), un job par groupe
+    Lot refusé (400, 413) ou éléments non mis en file : leurs empreintes de déduplication
+    sont libérées, le renvoi du lot corrigé n'est pas pris pour des doublons
+    """
+    groups = {}
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            items = (json.loads(line) for line in request.stream if line.strip())
+        else:
+            items = request.get_json(silent=True)
+            if not isinstance(items, list):
+                return jsonify({'error': 'Tableau JSON attendu'}), 400
+        
+        # Validation et regroupement par type en une seule passe
+        # La limite du client est décomptée par notification ; au premier refus,
+        # les éléments suivants sont marqués 'throttled' (à renvoyer après Retry-After)
+        statuses = []
+        client = client_key()
+        throttle_delay = 0.0
+        throttled = 0
+        for index, item in enumerate(items):
+            if index >= BATCH_MAX_ITEMS:
+                release_groups(groups)
+                return jsonify({'error': f'Maximum {BATCH_MAX_ITEMS} notifications par lot'}), 413
+            alert_type = item.get('type') if isinstance(item, dict) else None
+            message = item.get('message') if isinstance(item, dict) else None
+            try:
+                audience = Audience.from_dict(item['audience']) if item.get('audience') is not None else None
+            except (ValueError, AttributeError) as e:
+                audience = e
+            if not alert_type or not message:
+                statuses.append({'index': index, 'status': 'error', 'error': 'Type et message requis'})
+            elif alert_type not in ALERT_DISPATCH:
+                statuses.append({'index': index, 'status': 'error', 'error': 'Type non supporté'})
+            elif isinstance(audience, Exception):
+                statuses.append({'index': index, 'status': 'error', 'error': str(audience)})
+            elif api_limiter is not None and (throttle_delay or
+                                              (throttle_delay := api_limiter.try_acquire(client))):
+                statuses.append({'index': index, 'status': 'throttled'})
+                throttled += 1
+            elif dedup.check(alert_type, message, audience) is not None:
+                statuses.append({'index': index, 'status': duplicate_status()})
+            else:
+                statuses.append({'index': index, 'status': 'accepted'})
+                key = (alert_type, audience.key() if audience is not None else None)
+                groups.setdefault(key, (audience, []))[1].append((index, message))
+        
+        # Un job par groupe (découpé en morceaux de BATCH_JOB_SIZE)
+        # File pleine : les morceaux restants sont marqués 'unavailable' (à renvoyer après Retry-After)
+        full = None
+        unavailable = 0
+        for (alert_type, _), (audience, group) in groups.items():
+            for start in range(0, len(group), BATCH_JOB_SIZE):
+                chunk = group[start:start + BATCH_JOB_SIZE]
+                if full is None:
+                    try:
+                        job = jobs.enqueue(make_payload(alert_type, audience, messages=[m for _, m in chunk]))
+                    except QueueFullError as e:
+                        full = e
+                if full is not None:
+                    for index, message in chunk:
+                        statuses[index]['status'] = 'unavailable'
+                        dedup.release(alert_type, message, audience)
+                    unavailable += len(chunk)
+                    continue
+                for index, _ in chunk:
+                    statuses[index]['job_id'] = job.id
+        
+        accepted = sum(len(group) for _, group in groups.values()) - unavailable
+        suppressed = sum(1 for status in statuses if status['status'] == duplicate_status())
+        status = 'accepted'
+        if not accepted and (unavailable or throttled):
+            status = 'unavailable' if unavailable else 'throttled'
+        response = jsonify({
+            'status': status,
+            'accepted': accepted,
+            'suppressed': suppressed,
+            'throttled': throttled,
+            'unavailable': unavailable,
+            'rejected': len(statuses) - accepted - suppressed - throttled - unavailable,
+            'items': statuses,
+            'timestamp': datetime.now().isoformat()
+        })
+        if full is not None:
+            response.headers['Retry-After'] = str(math.ceil(full.retry_after))
+            if not accepted:
+                return response, 503
+        elif throttled:
+            # Temps pour regagner les jetons de tous les éléments refusés
+            retry_after = throttle_delay + (throttled - 1) / api_limiter.rate
+            response.headers['Retry-After'] = str(math.ceil(retry_after))
+            if not accepted:
+                return response, 429
+        return response, 202
+    
+    except ValueError as e:  # JSON invalide (NDJSON)
+        release_groups(groups)
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        release_groups(groups)
+        return jsonify({'error': str(e)}), 500
+
+def release_groups(groups):
+    """Lot refusé : libère les empreintes réservées par les éléments acceptés"""
+    for (alert_type, _), (audience, group) in groups.items():
+        for _, message in group:
+            dedup.release(alert_type, message, audience)
+
+# Flux en direct (Server-Sent Events)
+@app.route('/api/stream')
+def api_stream():
+    """
+    Photo des statistiques à la connexion, puis uniquement des deltas ('stats')
+    et les nouvelles notifications ('notifications')
+    Un client trop lent pour suivre reçoit une nouvelle photo au lieu des deltas perdus
+    """
+    with live_lock:
+        subscription = hub.subscribe()
+        snapshot = stats.snapshot()
+    
+    def generate():
+        try:
+            yield "retry: 3000\n" + format_event('snapshot', snapshot)
+            while True:
+                messages = subscription.read(timeout=STREAM_KEEPALIVE)
+                if subscription.lagged:
+                    with live_lock:
+                        subscription.skip()
+                        resync = stats.snapshot()
+                    yield format_event('snapshot', resync)
+                elif messages:
+                    yield "".join(messages)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def parse_time(value):
+    """Timestamp epoch ou date ISO 8601 -> epoch (None si absent)"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+# Historique paginé
+@app.route('/api/notifications')
+def api_notifications():
+    """
+    Historique filtrable (type, priority, since, until) et paginé par curseur
+    La réponse JSON est produite en flux : un gros export ne construit pas de liste
+    """
+    try:
+        limit = min(int(request.args.get('limit', 50)), PAGE_MAX_SIZE)
+        since = parse_time(request.args.get('since'))
+        until = parse_time(request.args.get('until'))
+        cursor = request.args.get('cursor')
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if limit <= 0:
+        return jsonify({'error': 'limit doit être positif'}), 400
+    
+    records = notifications_history.query(
+        alert_type=request.args.get('type'),
+        priority=request.args.get('priority'),
+        since=since, until=until, before=before, limit=limit
+    )
+    
+    def generate():
+        yield '{"items": ['
+        count = 0
+        last = None
+        for record in records:
+            yield (', ' if count else '') + json.dumps(record.to_dict(), ensure_ascii=False)
+            count += 1
+            last = record
+        next_cursor = encode_cursor(last) if count == limit else None
+        yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+# Suivi d'un job
+@app.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    """État d'avancement d'un job d'envoi"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job introuvable'}), 404
+    return jsonify(job.to_dict())
+
+# Envois programmés : état et annulation
+@app.route('/api/scheduled/<entry_id>', methods=['GET', 'DELETE'])
+def api_scheduled(entry_id):
+    """État d'un envoi programmé ; DELETE l'annule tant qu'il n'est pas parti"""
+    if request.method == 'DELETE' and scheduler.cancel(entry_id):
+        return jsonify({'id': entry_id, 'status': 'cancelled'})
+    entry = scheduler.get(entry_id)
+    if entry is None:
+        return jsonify({'error': 'Envoi programmé introuvable'}), 404
+    if request.method == 'DELETE':
+        return jsonify({'error': f"Envoi déjà {entry['status']}", **entry}), 409
+    return jsonify(entry)
+
+# API des statistiques
+@app.route('/api/stats')
+def api_stats():
+    """Statistiques précalculées (lecture en temps constant)"""
+    digester = get_digester()
+    return jsonify({
+        **stats.snapshot(),
+        **stats.timeline(),
+        'retries': get_scheduler().snapshot(),
+        'dedup': dedup.snapshot(),
+        'digest': digester.snapshot() if digester is not None else None,
+        'scheduled': scheduler.snapshot()
+    })
+
+# État des canaux (disjoncteurs, concurrence)
+@app.route('/api/channels')
+def api_channels():
+    """État des disjoncteurs et files de chaque canal"""
+    return jsonify(get_pipeline().channel_states())
+
+# Métriques Prometheus
+@app.route('/metrics')
+def metrics():
+    """Latences (p50/p90/p99/p99.9) et compteurs au format texte Prometheus"""
+    return Response(get_registry().render(), mimetype='text/plain; version=0.0.4')
+
 # Page de connexion simple
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -0,0 +1,71 @@
+"""
+Benchmark : /api/send/batch contre N appels /api/send
+Lancement : python -m benchmarks.bench_batch [N]
+Les canaux utilisent le transport factice (aucun envoi réel)
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")  # Les logs d'envoi faussent la mesure
+os.environ.setdefault("DEDUP_MODE", "off")     # Les mêmes messages sont envoyés à chaque variante
+os.environ.setdefault("API_RATE_LIMIT", "off")  # Mesure du débit brut, sans limite par client
+
+from core.delivery import DeliveryPipeline, FakeTransport, set_pipeline
+
+set_pipeline(DeliveryPipeline(FakeTransport()))
+
+import app  # noqa: E402  (après set_pipeline : les mixins utilisent le pipeline factice)
+
+
+def wait_for_total(expected, timeout=120):
+    """Attend que les workers aient enregistré `expected` notifications"""
+    deadline = time.monotonic() + timeout
+    while app.stats.total < expected and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def bench_single(client, n):
+    expected = app.stats.total + n
+    start = time.perf_counter()
+    for i in range(n):
+        client.post('/api/send', json={'type': 'SECURITY', 'message': f'Alerte {i}'})
+    accepted = time.perf_counter() - start
+    wait_for_total(expected)
+    return accepted, time.perf_counter() - start
+
+
+def bench_batch(client, n, ndjson=False):
+    items = [{'type': ('SECURITY', 'WEATHER')[i % 2], 'message': f'Alerte {i}'} for i in range(n)]
+    expected = app.stats.total + n
+    start = time.perf_counter()
+    if ndjson:
+        body = "\n".join(json.dumps(item) for item in items)
+        client.post('/api/send/batch', data=body, content_type='application/x-ndjson')
+    else:
+        client.post('/api/send/batch', json=items)
+    accepted = time.perf_counter() - start
+    wait_for_total(expected)
+    return accepted, time.perf_counter() - start
+
+
+def main(n=1000):
+    client = app.app.test_client()
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):  # Les logs d'envoi faussent la mesure
+        results['single'] = bench_single(client, n)
+        results['batch_json'] = bench_batch(client, n)
+        results['batch_ndjson'] = bench_batch(client, n, ndjson=True)
+
+    print(f"=== BENCHMARK ENVOI EN MASSE ({n} notifications) ===")
+    for name, (accepted, total) in results.items():
+        print(f"   {name:<13} réponse: {accepted * 1000:8.1f} ms   "
+              f"livraison: {total * 1000:8.1f} ms   ({n / total:,.0f} notif/s)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
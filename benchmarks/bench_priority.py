@@ -0,0 +1,76 @@
+"""
+Benchmark : latence des envois URGENT pendant qu'un arriéré de LOW sature le canal
+Lancement : python -m benchmarks.bench_priority [durée en secondes]
+Compare la file par priorité à une file FIFO (un seul niveau)
+"""
+
+import sys
+import threading
+import time
+
+from core.delivery import Delivery, DeliveryPipeline, FakeTransport
+
+URGENT_INTERVAL = 0.01  # Un URGENT toutes les 10 ms
+QUEUE_SIZE = 5000
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def run(duration, weights=None, flood=True):
+    """Retourne (latences URGENT en secondes, LOW livrés par seconde)"""
+    transport = FakeTransport(batch_latency=0.002, message_latency=0.0001)
+    pipeline = DeliveryPipeline(transport, channels=("sms",), queue_size=QUEUE_SIZE, weights=weights)
+    worker = pipeline.workers["sms"]
+    latencies = []
+    delivered_low = [0]
+    stop = threading.Event()
+
+    def count_low(_future):
+        delivered_low[0] += 1
+
+    def flood_low():
+        while not stop.is_set():
+            worker.submit(Delivery("sms", "Rappel cours", priority="LOW")).add_done_callback(count_low)
+
+    if flood:
+        producer = threading.Thread(target=flood_low, daemon=True)
+        producer.start()
+        while worker.queue.qsize() < QUEUE_SIZE * 0.9:  # Arriéré installé
+            time.sleep(0.01)
+
+    futures = []
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        sent_at = time.perf_counter()
+        future = worker.submit(Delivery("sms", "Intrusion", priority="URGENT"))
+        future.add_done_callback(lambda _f, t=sent_at: latencies.append(time.perf_counter() - t))
+        futures.append(future)
+        time.sleep(URGENT_INTERVAL)
+    low_rate = delivered_low[0] / (time.monotonic() - start)
+
+    stop.set()
+    for future in futures:  # Toutes les latences, y compris les plus lentes
+        future.result()
+    pipeline.close()
+    return latencies, low_rate
+
+
+def main(duration=3.0):
+    print(f"=== BENCHMARK PRIORITÉS ({duration:.0f} s, 1 URGENT / {URGENT_INTERVAL * 1000:.0f} ms) ===")
+    scenarios = [
+        ("sans charge", None, False),
+        ("LOW saturé, FIFO", {"MEDIUM": 1}, True),  # Un seul niveau : ordre d'arrivée
+        ("LOW saturé, priorité", None, True),
+    ]
+    for name, weights, flood in scenarios:
+        latencies, low_rate = run(duration, weights, flood)
+        print(f"   {name:<22} URGENT p50: {percentile(latencies, 50) * 1000:7.1f} ms   "
+              f"p99: {percentile(latencies, 99) * 1000:7.1f} ms   "
+              f"({len(latencies)} URGENT, {low_rate:,.0f} LOW/s)")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -0,0 +1,246 @@
+"""
+Suite de benchmarks reproductible : chemin d'envoi, décorateurs, dashboard, descripteurs, résumés
+Lancement : python -m benchmarks.run [--quick] [--output results.json]
+                                     [--baseline benchmarks/baseline.json] [--save-baseline]
+Les canaux utilisent le transport factice (aucun envoi réel), les routes le client de test Flask.
+Chaque mesure = médiane et p99 d'échantillons chronométrés, en microsecondes par opération ;
+les résultats (JSON) sont comparés à la référence enregistrée : une médiane plus lente
+de plus de --threshold (20 % par défaut) est signalée comme régression (code de sortie 1)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")       # Les logs d'envoi faussent la mesure
+os.environ.setdefault("DEDUP_MODE", "off")          # Messages répétés d'un échantillon à l'autre
+os.environ.setdefault("API_RATE_LIMIT", "off")      # Débit brut, sans 429
+os.environ.setdefault("CHANNEL_RATE_LIMITS", "off")
+os.environ.setdefault("RECIPIENT_RATE_LIMIT", "off")
+os.environ.setdefault("SCHEDULE_DB", ":memory:")        # Aucun fichier d'envois programmés
+os.environ.setdefault("DIGEST_MAX_PRIORITY", "off")  # Envois immédiats (bench_digest mesure les résumés)
+
+from core.delivery import DeliveryPipeline, FakeTransport, set_pipeline
+
+set_pipeline(DeliveryPipeline(FakeTransport()))
+
+import app  # noqa: E402  (après set_pipeline : les mixins utilisent le pipeline factice)
+from core.advanced import NotificationMeta, UserNotification  # noqa: E402
+from core.decorators import log_notification, priority, timed  # noqa: E402
+from core.digest import Digester, DigestItem  # noqa: E402
+from core.history import HistoryStore  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+HISTORY_SIZES = {"1k": 1000, "100k": 100000, "1M": 1000000}
+QUICK_HISTORY_SIZES = {"1k": 1000, "10k": 10000}
+
+
+def measure(fn, samples, inner=1):
+    """
+    Appelle fn() `inner` fois par échantillon (opérations trop courtes pour être
+    chronométrées une à une) ; retourne médiane/p99 en µs par opération
+    Un dixième des échantillons est exécuté avant la mesure (caches, imports paresseux)
+    """
+    for _ in range(max(1, samples // 10) * inner):
+        fn()
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter_ns()
+        for _ in range(inner):
+            fn()
+        timings.append((time.perf_counter_ns() - start) / inner / 1000)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    return {
+        'median_us': round(median, 3),
+        'p99_us': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3),
+        'ops_per_sec': round(1e6 / median) if median else None,
+        'samples': samples,
+        'inner': inner,
+    }
+
+
+def wait_for_total(expected, timeout=120):
+    """Attend que les workers aient enregistré `expected` notifications"""
+    deadline = time.monotonic() + timeout
+    while app.stats.total < expected and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+# ========== ALERTES ==========
+def bench_alerts(samples):
+    results = {}
+    for code, spec in NotificationMeta.get_alert_types().items():
+        results[f"alert.construct.{code}"] = measure(lambda: spec.cls("Benchmark"), samples, inner=100)
+
+        handles = []
+        alert = spec.cls("Benchmark")
+        results[f"alert.send.{code}"] = measure(lambda: handles.append(alert.send()), samples)
+        for handle in handles:  # Livraisons terminées avant la mesure suivante
+            handle.wait()
+    return results
+
+
+def bench_decorators(samples):
+    """Coût de chaque couche de la pile @log_notification / @timed / @priority"""
+    def send(self):
+        return "ok"
+
+    stacks = {
+        'raw': send,
+        'priority': priority("LOW")(send),
+        'timed': timed("benchmark_send", kind="timed")(send),
+        'log_notification': log_notification(send),
+        'full_stack': log_notification(timed("benchmark_send", kind="stack")(priority("LOW")(send))),
+    }
+    return {f"decorators.{name}": measure(lambda f=fn: f(None), samples, inner=1000)
+            for name, fn in stacks.items()}
+
+
+def bench_descriptors(samples):
+    notification = UserNotification("Benchmark", priority="HIGH", email="bench@campus.edu")
+    levels = ("LOW", "MEDIUM", "HIGH", "URGENT")
+
+    def set_priority():
+        for level in levels:
+            notification.priority = level
+
+    return {
+        'descriptor.get': measure(lambda: notification.priority, samples, inner=1000),
+        'descriptor.set': measure(set_priority, samples, inner=250),
+    }
+
+
+def bench_digest(samples):
+    """Mise en attente d'une alerte LOW (envoi global) et composition d'un résumé de 20 alertes"""
+    digester = Digester(max_priority="LOW", interval=3600, max_items=10 ** 9)
+    items = [DigestItem(f"Info Académique: Benchmark {i}", "LOW", 0) for i in range(20)]
+    return {
+        'digest.add': measure(lambda: digester.add("email", "Info Académique: Benchmark", "LOW"),
+                              samples, inner=100),
+        'digest.compose_20': measure(lambda: digester.compose(items, "fr"), samples, inner=100),
+    }
+
+
+# ========== ROUTES ==========
+def bench_routes(client, samples):
+    results = {}
+    expected = app.stats.total + 2 * samples
+    results['route.api_send'] = measure(
+        lambda: client.post('/api/send', json={'type': 'SECURITY', 'message': 'Benchmark'}), samples)
+    results['route.send_form'] = measure(
+        lambda: client.post('/send', data={'alert_type': 'WEATHER', 'message': 'Benchmark'}), samples)
+    wait_for_total(expected)
+    return results
+
+
+def bench_dashboard(client, samples, sizes):
+    """Rendu de /dashboard avec un historique de taille croissante, puis revalidation (304)"""
+    results = {}
+    previous = app.notifications_history
+    try:
+        for label, size in sizes.items():
+            history = HistoryStore(capacity=size)
+            for i in range(size):
+                history.append("SECURITY", "Benchmark", "URGENT", "🚨", "Alerte envoyée", created_at=i)
+            app.notifications_history = history
+            results[f"dashboard.{label}"] = measure(lambda: client.get('/dashboard'), samples)
+            etag = client.get('/dashboard').headers['ETag']
+            results[f"dashboard.{label}.not_modified"] = measure(
+                lambda: client.get('/dashboard', headers={'If-None-Match': etag}), samples)
+            app.notifications_history = None  # Libère le buffer avant le suivant
+    finally:
+        app.notifications_history = previous
+    return results
+
+
+# ========== RÉFÉRENCE ==========
+def compare(results, baseline, threshold):
+    """Lignes de comparaison et liste des régressions (médiane plus lente que threshold)"""
+    lines, regressions = [], []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            lines.append(f"   {name:<32} {result['median_us']:>12.2f} µs   (nouveau)")
+            continue
+        ratio = result['median_us'] / reference['median_us'] if reference['median_us'] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  RÉGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  amélioration"
+        lines.append(f"   {name:<32} {result['median_us']:>12.2f} µs   "
+                     f"référence {reference['median_us']:>12.2f} µs   x{ratio:.2f}{flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du chemin d'envoi et du dashboard")
+    parser.add_argument("--quick", action="store_true", help="moins d'échantillons, historique ≤ 10k")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", default=BASELINE, help="référence à comparer")
+    parser.add_argument("--save-baseline", action="store_true", help="enregistre les résultats comme référence")
+    parser.add_argument("--threshold", type=float, default=0.2, help="écart toléré (0.2 = 20 %%)")
+    args = parser.parse_args(argv)
+
+    samples = 20 if args.quick else 100
+    client = app.app.test_client()
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):  # Sorties console des canaux et démos
+        results.update(bench_alerts(samples))
+        results.update(bench_decorators(samples))
+        results.update(bench_descriptors(samples))
+        results.update(bench_digest(samples))
+        results.update(bench_routes(client, samples))
+        results.update(bench_dashboard(client, max(5, samples // 5),
+                                       QUICK_HISTORY_SIZES if args.quick else HISTORY_SIZES))
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"=== BENCHMARKS ({'rapide' if args.quick else 'complet'}) ===")
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if baseline is None:
+        for name, result in results.items():
+            print(f"   {name:<32} {result['median_us']:>12.2f} µs   p99 {result['p99_us']:>12.2f} µs")
+        regressions = []
+    else:
+        if baseline['meta'].get('python') != report['meta']['python']:
+            print(f"   (référence mesurée avec Python {baseline['meta'].get('python')})")
+        if baseline['meta'].get('quick') != args.quick:
+            print("   (référence mesurée dans l'autre mode : --quick a moins d'échantillons, écarts plus grands)")
+        lines, regressions = compare(results, baseline['results'], args.threshold)
+        print("\n".join(lines))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"   Référence enregistrée : {args.baseline}")
+    if regressions:
+        print(f"   {len(regressions)} régression(s) au-delà de {args.threshold:.0%} : {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
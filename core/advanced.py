@@ -2,57 +2,111 @@
 Concepts POO avancés : Descripteurs, Métaclasse, Décorateur de classe
 """
 
+import functools
 import re
+import threading
+import weakref
 from datetime import datetime
 
+from core.logs import get_logger
+from core.templates import compile_templates
+
+logger = get_logger("advanced")
+
 # ================== DESCRIPTEURS ==================
 
-class PriorityDescriptor:
+class ValidatedField:
     """
-    Descripteur pour valider les priorités
-    Valide que la priorité est: LOW, MEDIUM, HIGH ou URGENT
+    Descripteur de base pour les champs validés
+    La valeur est stockée dans l'instance elle-même (attribut privé défini
+    par __set_name__) : elle disparaît avec l'objet, sans registre global
     """
-    def __init__(self):
-        self.data = {}
-    
+    default = None
+
+    def __init__(self, default=None):
+        if default is not None:
+            self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.private_name = f"_{name}"  # Compatible __dict__ et __slots__
+
     def __get__(self, obj, objtype=None):
         if obj is None:
             return self
-        return self.data.get(id(obj), "MEDIUM")  # Valeur par défaut
-    
+        return getattr(obj, self.private_name, self.default)
+
     def __set__(self, obj, value):
-        valid_priorities = ["LOW", "MEDIUM", "HIGH", "URGENT"]
-        if value not in valid_priorities:
-            raise ValueError(f"Priorité invalide: {value}. Doit être: {valid_priorities}")
-        self.data[id(obj)] = value
+        self.validate(value)
+        setattr(obj, self.private_name, value)
+
+    def validate(self, value):
+        """À redéfinir : lève ValueError si la valeur est invalide"""
+        pass
+
+class PriorityDescriptor(ValidatedField):
+    """
+    Descripteur pour valider les priorités
+    Valide que la priorité est: LOW, MEDIUM, HIGH ou URGENT
+    """
+    default = "MEDIUM"  # Valeur par défaut
+    valid_priorities = ("LOW", "MEDIUM", "HIGH", "URGENT")
+
+    def validate(self, value):
+        if value not in self.valid_priorities:
+            raise ValueError(f"Priorité invalide: {value}. Doit être: {list(self.valid_priorities)}")
 
-class EmailDescriptor:
+class EmailDescriptor(ValidatedField):
     """
     Descripteur pour valider les emails
-    Utilise une regex simple
+    Utilise une regex simple, compilée une seule fois
     """
-    def __init__(self):
-        self.data = {}
-    
-    def __get__(self, obj, objtype=None):
-        if obj is None:
-            return self
-        return self.data.get(id(obj), "")
-    
-    def __set__(self, obj, value):
-        if value:  # Validation seulement si valeur non vide
-            pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(pattern, value):
-                raise ValueError(f"Email invalide: {value}")
-        self.data[id(obj)] = value
+    default = ""
+    pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+    def validate(self, value):
+        if value and not self.pattern.match(value):  # Validation seulement si valeur non vide
+            raise ValueError(f"Email invalide: {value}")
 
 # ================== MÉTACLASSE ==================
 
+class AlertSpec:
+    """
+    Entrée de la table de dispatch : code de type -> classe, priorité, icône, canaux
+    Les messages affichés par les routes sont préformatés une seule fois
+    templates : gabarits compilés par la métaclasse (core.templates.TemplateSet)
+    """
+    __slots__ = ('code', 'cls', 'priority', 'icon', 'label', 'channels', 'queued_message', 'templates')
+    
+    def __init__(self, code, cls, priority, icon, label, channels, templates=None):
+        self.code = code
+        self.cls = cls
+        self.priority = priority
+        self.icon = icon
+        self.label = label
+        self.channels = tuple(channels)
+        self.queued_message = f"{icon} Notification mise en file (job {{job_id}})"
+        self.templates = templates
+    
+    @classmethod
+    def from_class(cls, alert_class):
+        """Lit les attributs de la classe ; la priorité vient du décorateur @priority de send()"""
+        send = getattr(alert_class, 'send', None)
+        priority = getattr(send, 'priority_level', None) or getattr(alert_class, 'default_priority', "MEDIUM")
+        return cls(alert_class.alert_code, alert_class, priority,
+                   getattr(alert_class, 'icon', ""),
+                   getattr(alert_class, 'label', alert_class.alert_code.title()),
+                   getattr(alert_class, 'channels', ()),
+                   getattr(alert_class, 'compiled_templates', None))
+
 class NotificationMeta(type):
     """
     Métaclasse pour enregistrer automatiquement les classes de notification
+    Les classes qui déclarent `alert_code` alimentent aussi la table de dispatch
+    Les gabarits déclarés (`templates`) sont compilés ici, une fois par classe
     """
     _registry = {}  # Dictionnaire pour stocker les classes
+    _alert_types = {}  # Code de type (ex: SECURITY) -> AlertSpec
     
     def __new__(cls, name, bases, attrs):
         # Crée la classe normalement
@@ -64,7 +118,16 @@ class NotificationMeta(type):
         # Enregistre la classe (sauf les classes de base)
         if not name.startswith('Base'):
             cls._registry[name] = new_class
-            print(f"[MÉTACLASSE] Classe '{name}' enregistrée à {new_class.registered_at}")
+            logger.debug("[MÉTACLASSE] Classe '%s' enregistrée à %s", name, new_class.registered_at)
+        
+        # Gabarits compilés à la définition : une erreur de gabarit empêche l'import
+        if attrs.get('templates'):
+            new_class.compiled_templates = compile_templates(
+                attrs['templates'], getattr(new_class, 'channels', ()))
+        
+        # Table de dispatch (code propre à la classe, pas hérité)
+        if attrs.get('alert_code'):
+            cls._alert_types[attrs['alert_code']] = AlertSpec.from_class(new_class)
         
         return new_class
     
@@ -72,33 +135,65 @@ class NotificationMeta(type):
     def get_registered_classes(cls):
         """Retourne toutes les classes enregistrées"""
         return cls._registry
+    
+    @classmethod
+    def get_alert_types(cls):
+        """Retourne la table de dispatch {code: AlertSpec} (lookup en O(1))"""
+        return cls._alert_types
 
 # ================== DÉCORATEUR DE CLASSE ==================
 
-def track_instances(cls):
+def track_instances(cls=None, *, track_live=True, verbose=False):
     """
     Décorateur de classe pour tracker les instances créées
+    - compteur total protégé par un verrou (total_created)
+    - WeakSet des instances vivantes (live_count), sans les garder en mémoire
+    track_live=False ne garde que le compteur (mode production)
+    Utilisable avec ou sans arguments : @track_instances / @track_instances(track_live=False)
     """
-    original_init = cls.__init__
-    
-    # Compteur d'instances
-    cls._instances_count = 0
-    cls._instances_list = []
-    
-    def new_init(self, *args, **kwargs):
-        # Incrémente le compteur
-        cls._instances_count += 1
-        cls._instances_list.append(self)
+    def decorate(cls):
+        original_init = cls.__init__
+        lock = threading.Lock()
         
-        # Appelle l'init original
-        original_init(self, *args, **kwargs)
+        # Compteur d'instances et références faibles
+        cls._instances_count = 0
+        cls._live_instances = weakref.WeakSet() if track_live else None
         
-        print(f"[DÉCORATEUR] Instance {cls._instances_count} de {cls.__name__} créée")
-    
-    # Remplace l'init
-    cls.__init__ = new_init
+        @functools.wraps(original_init)
+        def new_init(self, *args, **kwargs):
+            # Appelle l'init original
+            original_init(self, *args, **kwargs)
+            
+            # Incrémente le compteur (seulement si l'init a réussi)
+            with lock:
+                cls._instances_count += 1
+                count = cls._instances_count
+            if cls._live_instances is not None:
+                cls._live_instances.add(self)
+            
+            if verbose:
+                logger.info("[DÉCORATEUR] Instance %d de %s créée", count, cls.__name__)
+        
+        def total_created(klass):
+            """Nombre total d'instances créées depuis le démarrage"""
+            return cls._instances_count
+        
+        def live_count(klass):
+            """Nombre d'instances encore en mémoire (None si non suivi)"""
+            if cls._live_instances is None:
+                return None
+            return len(cls._live_instances)
+        
+        # Remplace l'init et expose les compteurs
+        cls.__init__ = new_init
+        cls.total_created = classmethod(total_created)
+        cls.live_count = classmethod(live_count)
+        
+        return cls
     
-    return cls
+    if cls is None:
+        return decorate
+    return decorate(cls)
 
 # ================== CLASSES DE DÉMONSTRATION ==================
 
@@ -155,9 +250,35 @@ if __name__ == "__main__":
     
     # Test du décorateur de classe
     print("\n3. Test du décorateur de classe:")
-    print(f"   Instances créées: {UserNotification._instances_count}")
+    print(f"   Instances créées: {UserNotification.total_created()}")
     
     # Créer une autre instance pour tester
     notif2 = UserNotification("Deuxième test", priority="LOW")
     print(f"   Nouvelle instance: {notif2}")
-    print(f"   Total instances: {UserNotification._instances_count}")
\ No newline at end of file
+    print(f"   Total instances: {UserNotification.total_created()}")
+    print(f"   Instances vivantes: {UserNotification.live_count()}")
+    del notif2
+    print(f"   Instances vivantes après suppression: {UserNotification.live_count()}")
+    
+    # Micro-benchmark : la mémoire reste stable (descripteurs + compteur seul)
+    print("\n4. Micro-benchmark des descripteurs (1M instances):")
+    import tracemalloc
+    
+    @track_instances(track_live=False)
+    class BenchNotification:
+        priority = PriorityDescriptor()
+        email = EmailDescriptor()
+        
+        def __init__(self, priority, email):
+            self.priority = priority
+            self.email = email
+    
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i in range(1, 1_000_001):
+        BenchNotification("HIGH", "test@campus.edu")
+        if i % 250_000 == 0:
+            current = tracemalloc.get_traced_memory()[0] - baseline
+            print(f"   {i:>9} instances: {current / 1024:.1f} Ko")
+    tracemalloc.stop()
+    print(f"   Compteur: {BenchNotification.total_created()} / vivantes: {BenchNotification.live_count()}")
\ No newline at end of file
@@ -2,8 +2,14 @@
 Classes d'alerte qui utilisent TES mixins SMS/Email/Push
 """
 
+from operator import attrgetter
+
 from core.mixins import SMSMixin, EmailMixin, PushMixin
-from core.decorators import log_notification, priority
+from core.delivery import DeliveryHandle
+from core.advanced import NotificationMeta
+from core.logs import get_logger
+from core.decorators import log_notification, priority, timed
+from core.scheduling import priority_of
 from core.notifiers import (
     SecurityEmergencyMixin, 
     WeatherEmergencyMixin,
@@ -11,14 +17,35 @@ from core.notifiers import (
     AcademicEmergencyMixin
 )
 
-class BaseAlert:
-    """Classe de base pour toutes les alertes"""
-    def __init__(self, message):
+logger = get_logger("alerts")
+
+# Labels des métriques d'envoi (notification_send_seconds{type, priority})
+SEND_LABELS = {"type": attrgetter("alert_code"), "priority": priority_of}
+
+class BaseAlert(metaclass=NotificationMeta):
+    """
+    Classe de base pour toutes les alertes
+    Les sous-classes déclarent alert_code/icon/label/channels :
+    la métaclasse les ajoute à la table de dispatch utilisée par app.py
+    send(audience=None) : sans audience, envoi global ; sinon destinataires
+    ciblés (core.audience.Audience) livrés par morceaux
+    templates : {canal: {langue: gabarit}}, compilés par la métaclasse (core.templates)
+    """
+    def __init__(self, message, locale=None):
         self.message = message
+        self.locale = locale  # None : NOTIFICATION_LOCALE
         self.sent = False
     
     def get_formatted_message(self):
         return f"[{self.__class__.__name__}] {self.message}"
+    
+    def render(self, channel):
+        """
+        Texte du canal, rendu une fois par envoi et partagé par tous les destinataires
+        (gabarit partiel si le texte contient des champs propres au destinataire)
+        """
+        return self.compiled_templates.get(channel, self.locale).bind(
+            message=self.message, icon=self.icon, label=self.label, priority=self.priority)
 
 # ========== ALERTE SÉCURITÉ ==========
 class SecurityAlert(
@@ -30,24 +57,37 @@ class SecurityAlert(
     Alerte de sécurité - Priorité URGENT
     Utilise tous les canaux (SMS, Email, Push)
     """
-    def __init__(self, message):
-        super().__init__(message)
+    alert_code = "SECURITY"
+    icon = "🚨"
+    label = "Sécurité"
+    channels = ("sms", "email", "push")
+    templates = {
+        "sms": {"fr": "[URGENT] {message}", "en": "[URGENT] {message}"},
+        "email": {"fr": "Alerte Sécurité: {message}", "en": "Security alert: {message}"},
+        "push": {"fr": "{icon} {message}", "en": "{icon} {message}"},
+    }
+    
+    def __init__(self, message, locale=None):
+        super().__init__(message, locale)
         self.priority = "URGENT"
     
     @log_notification
+    @timed("notification_send", **SEND_LABELS)
     @priority("URGENT")
-    def send(self):
+    def send(self, audience=None):
         """Envoie l'alerte sur tous les canaux"""
-        msg = self.get_formatted_message()
-        print(f"🚨 Envoi alerte SÉCURITÉ ({self.priority}): {self.message}")
+        logger.info("🚨 Envoi alerte SÉCURITÉ (%s): %s", self.priority, self.message)
         
         # Utilise TES mixins
-        self.send_sms(f"[URGENT] {self.message}")
-        self.send_email(f"Alerte Sécurité: {self.message}")
-        self.send_push(f"🚨 {self.message}")
+        # Les 3 canaux partent en parallèle
+        futures = [
+            self.send_sms(self.render("sms"), audience),
+            self.send_email(self.render("email"), audience),
+            self.send_push(self.render("push"), audience),
+        ]
         
         self.sent = True
-        return f"Alerte sécurité envoyée sur 3 canaux"
+        return DeliveryHandle("Alerte sécurité envoyée sur 3 canaux", futures)
 
 # ========== ALERTE MÉTÉO ==========
 class WeatherAlert(
@@ -59,22 +99,30 @@ class WeatherAlert(
     Alerte météo - Priorité MOYENNE
     Utilise seulement Email
     """
-    def __init__(self, message):
-        super().__init__(message)
+    alert_code = "WEATHER"
+    icon = "🌧️"
+    label = "Météo"
+    channels = ("email",)
+    templates = {
+        "email": {"fr": "Alerte Météo: {message}", "en": "Weather alert: {message}"},
+    }
+    
+    def __init__(self, message, locale=None):
+        super().__init__(message, locale)
         self.priority = "MEDIUM"
     
     @log_notification
+    @timed("notification_send", **SEND_LABELS)
     @priority("MEDIUM")
-    def send(self):
+    def send(self, audience=None):
         """Envoie l'alerte par email seulement"""
-        msg = self.get_formatted_message()
-        print(f"🌧️ Envoi alerte MÉTÉO ({self.priority}): {self.message}")
+        logger.info("🌧️ Envoi alerte MÉTÉO (%s): %s", self.priority, self.message)
         
         # Utilise TES mixins
-        self.send_email(f"Alerte Météo: {self.message}")
+        futures = [self.send_email(self.render("email"), audience)]
         
         self.sent = True
-        return f"Alerte météo envoyée par email"
+        return DeliveryHandle("Alerte météo envoyée par email", futures)
 
 # ========== ALERTE SANTÉ ==========
 class HealthAlert(
@@ -86,23 +134,34 @@ class HealthAlert(
     Alerte santé - Priorité HAUTE
     Utilise SMS et Email
     """
-    def __init__(self, message):
-        super().__init__(message)
+    alert_code = "HEALTH"
+    icon = "🏥"
+    label = "Santé"
+    channels = ("sms", "email")
+    templates = {
+        "sms": {"fr": "[SANTÉ] {message}", "en": "[HEALTH] {message}"},
+        "email": {"fr": "Alerte Santé: {message}", "en": "Health alert: {message}"},
+    }
+    
+    def __init__(self, message, locale=None):
+        super().__init__(message, locale)
         self.priority = "HIGH"
     
     @log_notification
+    @timed("notification_send", **SEND_LABELS)
     @priority("HIGH")
-    def send(self):
+    def send(self, audience=None):
         """Envoie l'alerte par SMS et Email"""
-        msg = self.get_formatted_message()
-        print(f"🏥 Envoi alerte SANTÉ ({self.priority}): {self.message}")
+        logger.info("🏥 Envoi alerte SANTÉ (%s): %s", self.priority, self.message)
         
         # Utilise TES mixins
-        self.send_sms(f"[SANTÉ] {self.message}")
-        self.send_email(f"Alerte Santé: {self.message}")
+        futures = [
+            self.send_sms(self.render("sms"), audience),
+            self.send_email(self.render("email"), audience),
+        ]
         
         self.sent = True
-        return f"Alerte santé envoyée par SMS et email"
+        return DeliveryHandle("Alerte santé envoyée par SMS et email", futures)
 
 # ========== ALERTE ACADÉMIQUE ==========
 class AcademicAlert(
@@ -114,25 +173,36 @@ class AcademicAlert(
     Alerte académique - Priorité BASSE
     Utilise seulement Email
     """
-    def __init__(self, message):
-        super().__init__(message)
+    alert_code = "ACADEMIC"
+    icon = "📚"
+    label = "Académique"
+    channels = ("email",)
+    templates = {
+        "email": {"fr": "Info Académique: {message}", "en": "Academic notice: {message}"},
+    }
+    
+    def __init__(self, message, locale=None):
+        super().__init__(message, locale)
         self.priority = "LOW"
     
     @log_notification
+    @timed("notification_send", **SEND_LABELS)
     @priority("LOW")
-    def send(self):
+    def send(self, audience=None):
         """Envoie l'alerte par email seulement"""
-        msg = self.get_formatted_message()
-        print(f"📚 Envoi alerte ACADÉMIQUE ({self.priority}): {self.message}")
+        logger.info("📚 Envoi alerte ACADÉMIQUE (%s): %s", self.priority, self.message)
         
         # Utilise TES mixins
-        self.send_email(f"Info Académique: {self.message}")
+        futures = [self.send_email(self.render("email"), audience)]
         
         self.sent = True
-        return f"Alerte académique envoyée par email"
+        return DeliveryHandle("Alerte académique envoyée par email", futures)
 
 # ========== TEST ==========
 if __name__ == "__main__":
+    from core.logs import configure_logging
+
+    configure_logging()
     print("=== TEST DES ALERTES ===")
     
     # Test alerte sécurité
@@ -140,22 +210,22 @@ if __name__ == "__main__":
     security = SecurityAlert("Intrusion bâtiment A")
     print(f"   Priorité: {security.priority}")
     print(f"   MRO: {SecurityAlert.__mro__}")
-    security.send()
+    security.send().wait()
     
     # Test alerte météo
     print("\n2. Test Alerte Météo:")
     weather = WeatherAlert("Pluies intenses prévues")
     print(f"   Priorité: {weather.priority}")
-    weather.send()
+    weather.send().wait()
     
     # Test alerte santé
     print("\n3. Test Alerte Santé:")
     health = HealthAlert("Cas COVID détecté")
     print(f"   Priorité: {health.priority}")
-    health.send()
+    health.send().wait()
     
     # Test alerte académique
     print("\n4. Test Alerte Académique:")
     academic = AcademicAlert("Réunion reportée")
     print(f"   Priorité: {academic.priority}")
-    academic.send()
\ No newline at end of file
+    academic.send().wait()
\ No newline at end of file
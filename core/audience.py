@@ -0,0 +1,271 @@
+"""
+Annuaire des destinataires et ciblage par audience
+Stockage en colonnes (une liste ou un array par attribut, l'id est l'indice)
+et index inversés groupe/bâtiment/rôle -> ids d'utilisateurs.
+Les adresses sont produites par morceaux de taille fixe (générateurs) :
+cibler 50 000 personnes ne construit jamais 50 000 messages
+"""
+
+import csv
+import heapq
+import threading
+from array import array
+
+from core.logs import get_logger
+
+logger = get_logger("audience")
+
+CHUNK_SIZE = 500  # Destinataires par livraison (un lot chez le fournisseur)
+DIMENSIONS = ("groups", "buildings", "roles")
+_EMPTY = array('I')
+
+
+class Audience:
+    """
+    Sélection de destinataires : OU à l'intérieur d'un critère, ET entre critères
+    Audience(groups=["L3"], buildings=["A", "B"]) = étudiants de L3 des bâtiments A ou B
+    Sans aucun critère : tout l'annuaire
+    """
+    __slots__ = DIMENSIONS
+
+    def __init__(self, groups=(), buildings=(), roles=()):
+        self.groups = tuple(groups)
+        self.buildings = tuple(buildings)
+        self.roles = tuple(roles)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Depuis le JSON des routes ; ValueError si le format est invalide"""
+        if not isinstance(data, dict):
+            raise ValueError("audience doit être un objet")
+        unknown = set(data) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Critères d'audience inconnus: {', '.join(sorted(unknown))}")
+        for dimension, values in data.items():
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise ValueError(f"audience.{dimension} doit être une liste de chaînes")
+        return cls(**data)
+
+    def to_dict(self):
+        return {dimension: list(getattr(self, dimension)) for dimension in DIMENSIONS
+                if getattr(self, dimension)}
+
+    def key(self):
+        """Forme canonique (regroupement des lots, déduplication)"""
+        return "|".join(f"{d}={','.join(sorted(getattr(self, d)))}" for d in DIMENSIONS)
+
+    def __repr__(self):
+        return f"Audience({self.to_dict()})"
+
+
+class UserDirectory:
+    """
+    Annuaire en colonnes
+    - adresses : une liste par canal (None si absente)
+    - bâtiment et rôle : codes 16 bits (array 'H') + table des valeurs
+    - groupes (multi-valués) : uniquement dans l'index inversé
+    Les listes d'ids de l'index sont des array('I') triés (ids attribués en ordre croissant)
+    """
+    def __init__(self):
+        self.names = []
+        self.addresses = {"sms": [], "email": [], "push": []}
+        self.building_codes = array('H')
+        self.role_codes = array('H')
+        self._values = {"buildings": [None], "roles": [None]}  # Code 0 = non renseigné
+        self._codes = {"buildings": {}, "roles": {}}
+        self._index = {dimension: {} for dimension in DIMENSIONS}
+        self._lock = threading.Lock()
+
+    def _code(self, dimension, value):
+        if value is None:
+            return 0
+        codes = self._codes[dimension]
+        if value not in codes:
+            codes[value] = len(self._values[dimension])
+            self._values[dimension].append(value)
+        return codes[value]
+
+    def _post(self, dimension, value, user_id):
+        self._index[dimension].setdefault(value, array('I')).append(user_id)
+
+    def add(self, name, email=None, phone=None, push_token=None, groups=(), building=None, role=None):
+        """Ajoute un utilisateur et retourne son id"""
+        with self._lock:
+            user_id = len(self.names)
+            self.names.append(name)
+            self.addresses["sms"].append(phone or None)
+            self.addresses["email"].append(email or None)
+            self.addresses["push"].append(push_token or None)
+            self.building_codes.append(self._code("buildings", building))
+            self.role_codes.append(self._code("roles", role))
+            for group in dict.fromkeys(groups):  # Sans doublon, ordre conservé
+                self._post("groups", group, user_id)
+            if building is not None:
+                self._post("buildings", building, user_id)
+            if role is not None:
+                self._post("roles", role, user_id)
+            return user_id
+
+    def __len__(self):
+        return len(self.names)
+
+    def get(self, user_id):
+        """Fiche d'un utilisateur (reconstruite depuis les colonnes)"""
+        return {
+            'id': user_id,
+            'name': self.names[user_id],
+            'email': self.addresses["email"][user_id],
+            'phone': self.addresses["sms"][user_id],
+            'push_token': self.addresses["push"][user_id],
+            'building': self._values["buildings"][self.building_codes[user_id]],
+            'role': self._values["roles"][self.role_codes[user_id]],
+        }
+
+    def members(self, dimension, value):
+        """Ids triés des membres d'un groupe / bâtiment / rôle"""
+        return self._index[dimension].get(value, _EMPTY)
+
+    def select(self, audience=None):
+        """
+        Générateur des ids ciblés, en ordre croissant
+        Parcourt le critère le plus sélectif ; les autres sont testés par id
+        (codes pour bâtiment/rôle, masque d'octets pour les groupes)
+        """
+        size = len(self.names)
+        criteria = [(d, getattr(audience, d)) for d in DIMENSIONS if audience is not None and getattr(audience, d)]
+        if not criteria:
+            yield from range(size)
+            return
+        criteria.sort(key=lambda c: sum(len(self.members(c[0], v)) for v in c[1]))
+        (dimension, values), others = criteria[0], criteria[1:]
+
+        tests = []
+        for other, other_values in others:
+            if other == "groups":
+                mask = bytearray(size)
+                for value in other_values:
+                    for user_id in self.members(other, value):
+                        if user_id < size:
+                            mask[user_id] = 1
+                tests.append(mask)
+            else:
+                codes = self.building_codes if other == "buildings" else self.role_codes
+                wanted = {self._codes[other][v] for v in other_values if v in self._codes[other]}
+                tests.append(_CodeFilter(codes, wanted))
+
+        postings = [self.members(dimension, value) for value in values]
+        candidates = postings[0] if len(postings) == 1 else _unique(heapq.merge(*postings))
+        for user_id in candidates:
+            if user_id < size and all(test[user_id] for test in tests):
+                yield user_id
+
+    def count(self, audience=None):
+        return sum(1 for _ in self.select(audience))
+
+    def chunks(self, audience, channel, size=CHUNK_SIZE):
+        """
+        Générateur de listes d'au plus `size` adresses pour le canal
+        Les utilisateurs sans adresse sur ce canal sont ignorés
+        """
+        addresses = self.addresses[channel]
+        chunk = []
+        for user_id in self.select(audience):
+            address = addresses[user_id]
+            if address is not None:
+                chunk.append(address)
+                if len(chunk) == size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    @classmethod
+    def from_csv(cls, path):
+        """Colonnes : name,email,phone,push_token,groups (séparés par ;),building,role"""
+        directory = cls()
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                directory.add(
+                    row["name"], row.get("email"), row.get("phone"), row.get("push_token"),
+                    groups=[g for g in (row.get("groups") or "").split(";") if g],
+                    building=row.get("building") or None, role=row.get("role") or None,
+                )
+        logger.info("[ANNUAIRE] %d utilisateurs chargés depuis %s", len(directory), path)
+        return directory
+
+
+class _CodeFilter:
+    """Test d'appartenance par id via la colonne de codes"""
+    __slots__ = ('codes', 'wanted')
+
+    def __init__(self, codes, wanted):
+        self.codes = codes
+        self.wanted = wanted
+
+    def __getitem__(self, user_id):
+        return self.codes[user_id] in self.wanted
+
+
+def _unique(ids):
+    """Supprime les doublons consécutifs d'un flux trié (union de listes d'index)"""
+    previous = None
+    for user_id in ids:
+        if user_id != previous:
+            yield user_id
+            previous = user_id
+
+
+_directory = UserDirectory()
+
+
+def get_directory():
+    """Annuaire partagé par les alertes"""
+    return _directory
+
+
+def set_directory(directory):
+    """Remplace l'annuaire partagé (ex: chargé depuis un CSV)"""
+    global _directory
+    previous, _directory = _directory, directory
+    return previous
+
+
+def demo_directory(n, buildings=("A", "B", "C", "D"), groups=("L1", "L2", "L3", "M1", "M2")):
+    """Annuaire synthétique de n utilisateurs (démo, benchmarks)"""
+    directory = UserDirectory()
+    for i in range(n):
+        directory.add(
+            f"user{i}", email=f"user{i}@campus.edu", phone=f"+3360000{i:04d}" if i % 3 else None,
+            push_token=f"tok{i}" if i % 2 else None,
+            groups=(groups[i % len(groups)],), building=buildings[i % len(buildings)],
+            role="staff" if i % 10 == 0 else "student",
+        )
+    return directory
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    import sys
+    import time
+    import tracemalloc
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"=== TEST DE L'ANNUAIRE ({n} utilisateurs) ===")
+    tracemalloc.start()
+    directory = demo_directory(n)
+    size, _ = tracemalloc.get_traced_memory()
+    print(f"   Mémoire de l'annuaire : {size / 1024 / 1024:.1f} Mo")
+
+    audience = Audience(buildings=["A", "B"], roles=["student"])
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    chunks = recipients = 0
+    for chunk in directory.chunks(audience, "email"):
+        chunks += 1
+        recipients += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    print(f"   {audience} : {recipients} emails en {chunks} lots de {CHUNK_SIZE} "
+          f"({elapsed * 1000:.1f} ms, pic {(peak - base) / 1024:.0f} Ko)")
+    print(f"   Tout l'annuaire par SMS : {sum(len(c) for c in directory.chunks(None, 'sms'))} numéros")
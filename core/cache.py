@@ -0,0 +1,88 @@
+"""
+Cache LRU en mémoire pour les fragments de pages rendus
+La clé contient la version des données affichées (ex: version de l'historique) :
+une nouvelle notification change la clé, l'ancien fragment n'est plus demandé
+et finit évincé. Le coût de rendu suit donc le rythme des écritures,
+pas le nombre de navigateurs ouverts sur la page
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Au plus `maxsize` entrées ; la moins récemment utilisée est évincée
+    get_or_set calcule hors verrou : deux lecteurs simultanés d'une clé absente
+    peuvent rendre le même fragment, le premier stocké est conservé
+    """
+    def __init__(self, maxsize=128):
+        if maxsize <= 0:
+            raise ValueError(f"Taille de cache invalide: {maxsize}")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return value
+
+    def get_or_set(self, key, compute):
+        """Valeur en cache, sinon compute() stocké puis retourné"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    print("=== TEST DU CACHE DE FRAGMENTS ===")
+    renders = [0]
+
+    def render(version):
+        renders[0] += 1
+        return f"<ul>{version}</ul>"
+
+    cache = LRUCache(maxsize=4)
+    for view in range(1000):  # 1000 affichages, une nouvelle notification tous les 100
+        version = view // 100
+        cache.get_or_set(("recent", version), lambda: render(version))
+    print(f"   1000 affichages, 10 versions : {renders[0]} rendus, {cache.snapshot()}")
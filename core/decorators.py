@@ -1,23 +1,35 @@
-import time
+import asyncio
 import functools
+import logging
+import time
+from concurrent.futures import Future
 from typing import Callable, Any
 
+from core.delivery import gather
+from core.logs import get_logger
+from core.metrics import get_registry
+from core.retry import RetryBudget, RetryError, RetryPolicy, RetryScheduler, get_retry_executor, get_scheduler
+
+logger = get_logger("decorators")
+
 def log_notification(func: Callable) -> Callable:
     """
     Décorateur pour logger l'exécution d'une fonction de notification.
-    Affiche le nom de la fonction, les arguments et le résultat.
+    Les arguments et le résultat ne sont journalisés (et formatés)
+    qu'au niveau DEBUG ; les erreurs le sont toujours.
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        print(f"[LOG] Notification: {func.__name__}")
-        print(f"[LOG]   Args: {args}")
-        print(f"[LOG]   Kwargs: {kwargs}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("[LOG] Notification: %s args=%r kwargs=%r", func.__name__, args, kwargs)
         try:
             result = func(*args, **kwargs)
-            print(f"[LOG]   Résultat: {result}")
+            if debug:
+                logger.debug("[LOG] %s -> %s", func.__qualname__, result)
             return result
         except Exception as e:
-            print(f"[LOG]   Erreur: {e}")
+            logger.error("[LOG] %s a échoué: %s", func.__qualname__, e)
             raise
     return wrapper
 
@@ -29,27 +41,107 @@ def priority(level: str):
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            print(f"[PRIORITY] Niveau: {level}")
+            logger.debug("[PRIORITY] Niveau: %s", level)
             return func(*args, **kwargs)
         wrapper.priority_level = level  
         return wrapper
     return decorator
 
-def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
+def timed(metric: str, **labels):
     """
-    Décorateur pour réessayer une fonction en cas d'échec.
+    Décorateur pour mesurer une fonction de notification (core.metrics).
+    Chaque label est une valeur fixe ou une fonction appliquée au premier
+    argument (self), ex: @timed("notification_send", type=attrgetter("alert_code"))
+    Si la fonction retourne un Future (ou un DeliveryHandle), la durée est
+    mesurée jusqu'à la fin de la livraison ; une erreur compte comme échec.
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            for attempt in range(1, max_retries + 1):
+            values = {name: value(args[0]) if callable(value) else value
+                      for name, value in labels.items()}
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                get_registry().observe(metric, values, time.perf_counter() - start, failed=True)
+                raise
+            futures = [result] if isinstance(result, Future) else getattr(result, 'futures', None)
+            if futures is None:
+                get_registry().observe(metric, values, time.perf_counter() - start)
+                return result
+
+            def on_done(future):
+                failed = future.exception() is not None
+                get_registry().observe(metric, values, time.perf_counter() - start, failed)
+
+            gather(futures, None).add_done_callback(on_done)
+            return result
+        return wrapper
+    return decorator
+
+def retry_on_failure(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0,
+                     max_delay: float = 60.0, jitter: bool = True,
+                     budget: RetryBudget = None, scheduler: RetryScheduler = None, executor=None):
+    """
+    Décorateur pour réessayer une fonction en cas d'échec, sans bloquer.
+    - fonction normale : la première tentative est immédiate (thread appelant) ;
+      le RetryScheduler attend le délai (backoff exponentiel + jitter, jamais
+      time.sleep) puis soumet le réessai à `executor` (get_retry_executor()
+      par défaut) : une tentative lente ne bloque pas le thread de l'ordonnanceur
+    - coroutine : les réessais attendent avec asyncio.sleep
+    Attention, changement d'API : une fonction normale décorée retourne un
+    concurrent.futures.Future et non plus sa valeur ; utiliser .result()
+    (ou add_done_callback) pour l'obtenir.
+    Après max_retries tentatives : RetryError (cause = erreur d'origine),
+    et l'appel est placé dans la dead-letter list de l'ordonnanceur.
+    """
+    policy = RetryPolicy(max_retries, delay, backoff, max_delay, jitter)
+    
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                sched = scheduler or get_scheduler()
+                for attempt in range(1, max_retries + 1):
+                    sched.record_attempt()
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        logger.warning("[RETRY] %s: échec %d/%d: %s", func.__qualname__, attempt, max_retries, e)
+                        if attempt == max_retries:
+                            sched.dead_letter((func.__qualname__, args, kwargs), e)
+                            raise RetryError(f"Échec après {max_retries} tentatives", attempt) from e
+                        wait = policy.delay(attempt)
+                        sched.record_retry(wait)
+                        await asyncio.sleep(wait)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Future:
+            sched = scheduler or get_scheduler()
+            future = Future()
+            
+            def attempt(number):
+                if number > 1 and budget is not None:
+                    budget.release()
+                sched.record_attempt()
                 try:
-                    print(f"[RETRY] Tentative {attempt}/{max_retries}")
-                    return func(*args, **kwargs)
+                    future.set_result(func(*args, **kwargs))
+                    return
                 except Exception as e:
-                    print(f"[RETRY] Échec: {e}")
-                    if attempt < max_retries:
-                        time.sleep(delay)
-            raise Exception(f"Échec après {max_retries} tentatives")
+                    error = e
+                logger.warning("[RETRY] %s: échec %d/%d: %s", func.__qualname__, number, max_retries, error)
+                if number < max_retries and (budget is None or budget.try_acquire()):
+                    sched.schedule(policy.delay(number), (executor or get_retry_executor()).submit,
+                                   attempt, number + 1)
+                    return
+                sched.dead_letter((func.__qualname__, args, kwargs), error)
+                failure = RetryError(f"Échec après {number} tentatives", number)
+                failure.__cause__ = error
+                future.set_exception(failure)
+            
+            attempt(1)
+            return future
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
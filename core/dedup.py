@@ -0,0 +1,160 @@
+"""
+Déduplication des notifications répétées (tempêtes d'alertes)
+Clé = empreinte de (type, message normalisé), conservée `window` secondes
+dans un cache découpé en tranches de temps : l'éviction se fait par tranche entière
+- mode "drop" : les répétitions dans la fenêtre sont ignorées
+- mode "coalesce" : la première part immédiatement, les répétitions sont regroupées
+  en un seul envoi "(xN)" à la fin de la fenêtre
+"""
+
+import hashlib
+import threading
+import time
+from collections import deque
+
+from core.logs import get_logger
+from core.retry import get_scheduler
+
+logger = get_logger("dedup")
+
+DROP, COALESCE, OFF = "drop", "coalesce", "off"
+
+
+def normalize(message):
+    """Casse et espaces ignorés : 'Évacuation  bâtiment A ' == 'évacuation bâtiment a'"""
+    return " ".join(message.split()).casefold()
+
+
+def fingerprint(alert_type, message, scope=""):
+    return hashlib.blake2b(f"{alert_type}\0{scope}\0{normalize(message)}".encode(), digest_size=8).digest()
+
+
+class DedupEntry:
+    """Une notification vue dans la fenêtre et ses répétitions"""
+    __slots__ = ('alert_type', 'message', 'scope', 'first_seen', 'repeats', 'closed')
+
+    def __init__(self, alert_type, message, first_seen, scope=None):
+        self.alert_type = alert_type
+        self.message = message
+        self.scope = scope
+        self.first_seen = first_seen
+        self.repeats = 0
+        self.closed = False
+
+
+class Deduplicator:
+    """
+    check(type, message, scope) -> None si la notification doit partir (l'empreinte est
+    réservée), sinon l'entrée existante (la répétition est comptée et supprimée)
+    release(type, message, scope) : la notification réservée n'a finalement pas été acceptée
+    (file pleine, lot refusé) ; l'empreinte est libérée pour que le nouvel essai parte
+    scope : destinataires (objet avec key(), ex: Audience) ; None = tout le monde
+    on_coalesce(type, message, count, scope) est appelé en mode coalesce à la fin de la fenêtre
+    """
+    def __init__(self, window=60.0, mode=COALESCE, on_coalesce=None, slices=4, scheduler=None):
+        if mode not in (DROP, COALESCE, OFF):
+            raise ValueError(f"Mode de déduplication inconnu: {mode}")
+        self.window = window
+        self.mode = mode
+        self.on_coalesce = on_coalesce
+        self.slice_seconds = window / slices
+        self.scheduler = scheduler
+        self._entries = {}
+        self._slices = deque()  # (numéro de tranche, [empreintes]) du plus ancien au plus récent
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.suppressed = 0
+        self.suppressed_by_type = {}
+        self.coalesced = 0  # Envois "(xN)" effectués
+
+    def check(self, alert_type, message, scope=None, now=None):
+        if self.mode == OFF:
+            return None
+        now = time.monotonic() if now is None else now
+        key = fingerprint(alert_type, message, scope.key() if scope is not None else "")
+        with self._lock:
+            self.checked += 1
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None and not entry.closed and now - entry.first_seen < self.window:
+                entry.repeats += 1
+                self.suppressed += 1
+                self.suppressed_by_type[alert_type] = self.suppressed_by_type.get(alert_type, 0) + 1
+                return entry
+            entry = DedupEntry(alert_type, message, now, scope)
+            self._entries[key] = entry
+            number = int(now // self.slice_seconds)
+            if not self._slices or self._slices[-1][0] != number:
+                self._slices.append((number, []))
+            self._slices[-1][1].append(key)
+        if self.mode == COALESCE:
+            (self.scheduler or get_scheduler()).call_later(self.window, self._close, entry)
+        return None
+
+    def release(self, alert_type, message, scope=None):
+        if self.mode == OFF:
+            return
+        key = fingerprint(alert_type, message, scope.key() if scope is not None else "")
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                entry.closed = True  # Répétitions déjà comptées : regroupées par _close (coalesce)
+
+    def _evict(self, now):
+        """Supprime les tranches entièrement sorties de la fenêtre (appelé sous verrou)"""
+        horizon = now - self.window
+        while self._slices and (self._slices[0][0] + 1) * self.slice_seconds <= horizon:
+            _, keys = self._slices.popleft()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry.first_seen <= horizon:
+                    del self._entries[key]
+
+    def _close(self, entry):
+        """Fin de fenêtre (mode coalesce) : un seul envoi pour toutes les répétitions"""
+        with self._lock:
+            entry.closed = True
+            repeats = entry.repeats
+        if repeats and self.on_coalesce is not None:
+            self.coalesced += 1
+            logger.info("[DEDUP] %s répété %d fois, envoi regroupé", entry.alert_type, repeats)
+            self.on_coalesce(entry.alert_type, entry.message, repeats, entry.scope)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'window': self.window,
+                'checked': self.checked,
+                'suppressed': self.suppressed,
+                'suppressed_by_type': dict(self.suppressed_by_type),
+                'coalesced': self.coalesced,
+                'tracked': len(self._entries),
+            }
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    print("=== TEST DE LA DÉDUPLICATION ===")
+    sent = []
+    dedup = Deduplicator(window=0.2, mode=COALESCE, on_coalesce=lambda t, m, n, scope: sent.append(f"{m} (x{n})"))
+    for i in range(1000):
+        if dedup.check("SECURITY", "Intrusion  bâtiment A" if i % 2 else "intrusion bâtiment a") is None:
+            sent.append("Intrusion bâtiment A")
+    time.sleep(0.3)
+    print(f"   1000 soumissions -> {len(sent)} envois : {sent}")
+    print(f"   {dedup.snapshot()}")
+
+    # Non-régression : un envoi refusé (503 file pleine, lot invalide) puis renvoyé doit partir
+    dedup = Deduplicator(window=60, mode=DROP)
+    assert dedup.check("SECURITY", "Intrusion bâtiment B") is None
+    dedup.release("SECURITY", "Intrusion bâtiment B")  # File pleine : 503
+    assert dedup.check("SECURITY", "Intrusion bâtiment B") is None, "nouvel essai après 503 supprimé"
+    batch = [("HEALTH", f"Consigne {i}") for i in range(3)]
+    for alert_type, message in batch:
+        assert dedup.check(alert_type, message) is None
+    for alert_type, message in batch:  # Une ligne invalide : lot entier refusé (400)
+        dedup.release(alert_type, message)
+    assert all(dedup.check(t, m) is None for t, m in batch), "lot corrigé supprimé après 400"
+    assert dedup.check("SECURITY", "Intrusion bâtiment B") is not None
+    print("   Renvoi après refus : accepté")
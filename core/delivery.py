@@ -0,0 +1,457 @@
+"""
+Pipeline de livraison asynchrone pour les canaux SMS/Email/Push
+Chaque canal a sa file bornée et son worker : les canaux partent en parallèle
+et les messages d'un même canal sont envoyés par lots (ex: une session SMTP pour N emails)
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from core.logs import get_logger
+from core.retry import RetryBudget, RetryPolicy, get_scheduler
+from core.resilience import ChannelGuard
+from core.scheduling import DRAIN, PriorityQueue
+from core.templates import MessageTemplate
+from core.ratelimit import KeyedLimiter, TokenBucket, channel_limits_from_env, recipient_limit_from_env
+
+logger = get_logger("delivery")
+
+CHANNELS = ("sms", "email", "push")
+
+
+class DeliveryError(Exception):
+    """Erreur de livraison sur un canal"""
+    pass
+
+
+class Delivery:
+    """
+    Un message à livrer sur un canal
+    message : texte, ou gabarit partiel (core.templates.MessageTemplate) dont
+    seuls les champs propres au destinataire restent à rendre (render)
+    """
+    __slots__ = ('channel', 'message', 'recipients', 'priority', 'future', 'attempts')
+
+    def __init__(self, channel, message, recipients=None, priority=None):
+        self.channel = channel
+        self.message = message
+        self.recipients = recipients
+        self.priority = priority
+        self.future = Future()
+        self.attempts = 0
+
+    @property
+    def cost(self):
+        """Jetons consommés chez le fournisseur : un par destinataire"""
+        return len(self.recipients) if self.recipients else 1
+
+    @property
+    def personalized(self):
+        """True si le texte dépend du destinataire (champ {recipient} restant)"""
+        return isinstance(self.message, MessageTemplate)
+
+    def render(self, recipient=None):
+        """Texte pour un destinataire (le même texte pour tous s'il n'y a pas de champ à compléter)"""
+        if isinstance(self.message, MessageTemplate):
+            return self.message.render(recipient=recipient)
+        return self.message
+
+    def texts(self):
+        """(destinataire, texte) à envoyer ; (None, texte) pour un envoi global"""
+        if not self.recipients:
+            yield None, self.render()
+        elif not self.personalized:
+            for recipient in self.recipients:
+                yield recipient, self.message
+        else:
+            for recipient in self.recipients:
+                yield recipient, self.message.render(recipient=recipient)
+
+
+def gather(futures, result):
+    """Future terminé quand tous les `futures` le sont (première erreur propagée)"""
+    combined = Future()
+    pending = [len(futures)]
+    errors = []
+    lock = threading.Lock()
+
+    def on_done(future):
+        with lock:
+            pending[0] -= 1
+            if future.exception() is not None:
+                errors.append(future.exception())
+            finished = pending[0] == 0
+        if finished:
+            if errors:
+                combined.set_exception(errors[0])
+            else:
+                combined.set_result(result)
+
+    if not futures:
+        combined.set_result(result)
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+class DeliveryHandle(str):
+    """
+    Résultat de send() : le résumé habituel (c'est une str)
+    plus les Futures des livraisons en cours sur chaque canal
+    """
+    def __new__(cls, summary, futures=()):
+        handle = super().__new__(cls, summary)
+        handle.futures = list(futures)
+        return handle
+
+    def done(self):
+        """True si tous les canaux ont terminé"""
+        return all(f.done() for f in self.futures)
+
+    def wait(self, timeout=None):
+        """Attend la fin des livraisons et retourne leurs résultats"""
+        return [f.result(timeout=timeout) for f in self.futures]
+
+
+# ========== TRANSPORTS ==========
+
+class ConsoleTransport:
+    """Transport par défaut : affiche chaque message (comportement historique)"""
+    labels = {"sms": "SMS", "email": "EMAIL", "push": "PUSH"}
+
+    def send_batch(self, channel, deliveries):
+        label = self.labels.get(channel, channel.upper())
+        for delivery in deliveries:
+            if delivery.personalized:  # Texte propre à chaque destinataire
+                for recipient, text in delivery.texts():
+                    logger.info("[%s] Notification envoyée à %s : %s", label, recipient, text)
+            elif delivery.recipients:
+                logger.info("[%s] Notification envoyée à %d destinataires : %s",
+                            label, len(delivery.recipients), delivery.message)
+            else:
+                logger.info("[%s] Notification envoyée : %s", label, delivery.render())
+        return len(deliveries)
+
+
+class FakeTransport:
+    """
+    Transport factice pour les benchmarks hors ligne
+    Simule un coût fixe par lot (connexion) et un coût par message
+    Les textes sont rendus comme par un vrai fournisseur ; record=True les conserve
+    dans `messages` : [(canal, destinataire, texte)]
+    """
+    def __init__(self, batch_latency=0.0, message_latency=0.0, record=False):
+        self.batch_latency = batch_latency
+        self.message_latency = message_latency
+        self.record = record
+        self.messages = []
+        self.sent = dict.fromkeys(CHANNELS, 0)
+        self.batches = dict.fromkeys(CHANNELS, 0)
+        self._lock = threading.Lock()
+
+    def send_batch(self, channel, deliveries):
+        delay = self.batch_latency + self.message_latency * len(deliveries)
+        if delay:
+            time.sleep(delay)
+        rendered = [(channel, recipient, text) for delivery in deliveries for recipient, text in delivery.texts()]
+        with self._lock:
+            if self.record:
+                self.messages.extend(rendered)
+            self.sent[channel] = self.sent.get(channel, 0) + len(deliveries)
+            self.batches[channel] = self.batches.get(channel, 0) + 1
+        return len(deliveries)
+
+
+# ========== WORKERS ==========
+
+class ChannelWorker:
+    """
+    File bornée + thread(s) de livraison pour un canal
+    Le worker regroupe jusqu'à batch_size messages déjà en file ;
+    flush_interval > 0 attend en plus les messages qui arrivent pendant ce délai
+    Un lot en échec est replanifié (backoff + jitter) dans la limite du budget du canal
+    Les appels au transport passent par un ChannelGuard (disjoncteur, concurrence, délai)
+    La file sert les messages par priorité (core.scheduling, poids `weights`)
+    rate_limit (TokenBucket) : le worker attend ses jetons, les messages restent en file
+    recipient_limit (KeyedLimiter) : les destinataires au-delà du plafond sont remis en file plus tard
+    """
+    _stop = object()
+
+    def __init__(self, channel, transport, queue_size=1000, batch_size=50,
+                 flush_interval=0.0, workers=1, put_timeout=1.0,
+                 retry_policy=None, retry_budget=None, scheduler=None, guard=None, weights=None,
+                 rate_limit=None, recipient_limit=None):
+        self.channel = channel
+        self.transport = transport
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.queue = PriorityQueue(maxsize=queue_size, weights=weights)
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=3, base_delay=0.5, max_delay=30.0)
+        self.retry_budget = retry_budget or RetryBudget(max_pending=queue_size)
+        self.scheduler = scheduler or get_scheduler()
+        self.guard = guard or ChannelGuard(channel)
+        self.rate_limit = rate_limit
+        self.recipient_limit = recipient_limit
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0.0  # Secondes passées à attendre des jetons
+        self.deferred = 0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"delivery-{channel}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, delivery):
+        """Met un message en file ; échoue si la file reste pleine (backpressure)"""
+        try:
+            self.queue.put(delivery, delivery.priority, timeout=self.put_timeout)
+        except queue.Full:
+            delivery.future.set_exception(DeliveryError(f"File {self.channel} pleine"))
+        return delivery.future
+
+    def _next_batch(self, first):
+        """Retourne (lot, message mis de côté faute de jetons ou None)"""
+        if self.rate_limit is not None:
+            self.throttled += self.rate_limit.acquire(first.cost)
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self.queue.get(timeout=remaining)
+                else:
+                    item = self.queue.get_nowait()  # Seulement ce qui est déjà en file
+            except queue.Empty:
+                break
+            if item is self._stop:
+                self.queue.put(item, DRAIN)  # Laisse le signal d'arrêt aux autres threads
+                break
+            if self.rate_limit is not None and self.rate_limit.try_acquire(item.cost):
+                return batch, item  # Quota atteint : ce message ouvrira le prochain lot
+            batch.append(item)
+        return batch, None
+
+    def _run(self):
+        held = None
+        while True:
+            if held is None:
+                first = self.queue.get()
+            else:
+                first, held = held, None
+            if first is self._stop:
+                self.queue.put(first, DRAIN)
+                return
+            batch, held = self._next_batch(first)
+            self._deliver(batch)
+
+    def _cap_recipients(self, batch):
+        """
+        Retire de chaque livraison les destinataires au-dessus de leur plafond
+        Retourne (livraisons à envoyer, {livraison: (destinataires différés, délai)})
+        """
+        to_send, held_back = [], {}
+        for delivery in batch:
+            if not delivery.recipients:
+                to_send.append(delivery)
+                continue
+            allowed, denied, delay = [], [], 0.0
+            for recipient in delivery.recipients:
+                wait = self.recipient_limit.try_acquire(recipient)
+                if wait:
+                    denied.append(recipient)
+                    delay = max(delay, wait)
+                else:
+                    allowed.append(recipient)
+            if denied:
+                held_back[delivery] = (denied, delay)
+                delivery.recipients = allowed
+            if allowed:
+                to_send.append(delivery)
+        return to_send, held_back
+
+    def _deliver(self, batch):
+        held_back = {}
+        if self.recipient_limit is not None:
+            batch, held_back = self._cap_recipients(batch)
+        if batch:
+            self.scheduler.record_attempt(len(batch))
+            try:
+                self.guard.call(self.transport.send_batch, self.channel, batch)
+            except Exception as e:
+                logger.warning("[%s] Échec de livraison (%d messages): %s", self.channel, len(batch), e)
+                for delivery in batch:
+                    if delivery in held_back:  # Réessai avec tous ses destinataires
+                        delivery.recipients = delivery.recipients + held_back.pop(delivery)[0]
+                    self._retry_or_fail(delivery, e)
+            else:
+                self.sent += len(batch)
+                for delivery in batch:
+                    if delivery not in held_back:
+                        delivery.future.set_result(self.channel)
+        for delivery, (denied, delay) in held_back.items():
+            # Le Future reste en attente jusqu'à l'envoi des destinataires différés
+            delivery.recipients = denied
+            self.deferred += 1
+            self.scheduler.call_later(delay, self._requeue, delivery, False)
+
+    def _retry_or_fail(self, delivery, error):
+        """Replanifie le message, ou l'abandonne (dead letter) si épuisé"""
+        delivery.attempts += 1
+        if delivery.attempts < self.retry_policy.max_retries and self.retry_budget.try_acquire():
+            self.retried += 1
+            self.scheduler.schedule(self.retry_policy.delay(delivery.attempts), self._requeue, delivery)
+            return
+        self._fail(delivery, DeliveryError(f"{self.channel}: {error}"))
+
+    def _requeue(self, delivery, retry=True):
+        """Exécuté par l'ordonnanceur : ne bloque jamais"""
+        if retry:
+            self.retry_budget.release()
+        try:
+            self.queue.put_nowait(delivery, delivery.priority)
+        except queue.Full:
+            self._fail(delivery, DeliveryError(f"File {self.channel} pleine"))
+
+    def _fail(self, delivery, error):
+        self.failed += 1
+        self.scheduler.dead_letter((self.channel, str(delivery.message)), error)
+        delivery.future.set_exception(error)
+
+    def close(self, timeout=None):
+        """Vide la file puis arrête les threads, et enfin ceux du guard"""
+        self.queue.put(self._stop, DRAIN)
+        for thread in self._threads:
+            thread.join(timeout)
+        self.guard.close(timeout)
+
+
+class DeliveryPipeline:
+    """
+    Un ChannelWorker par canal
+    submit() retourne immédiatement un Future
+    guard_options : paramètres des ChannelGuard (max_concurrency, timeout, failure_threshold...)
+    rate_limits : {canal: (débit/s, rafale)} ; recipient_limit : (débit/s, rafale) par adresse
+    """
+    def __init__(self, transport=None, channels=CHANNELS, guard_options=None,
+                 rate_limits=None, recipient_limit=None, **worker_options):
+        self.transport = transport or ConsoleTransport()
+        rate_limits = rate_limits or {}
+        self.workers = {
+            channel: ChannelWorker(channel, self.transport,
+                                   guard=ChannelGuard(channel, **(guard_options or {})),
+                                   rate_limit=TokenBucket(*rate_limits[channel]) if channel in rate_limits else None,
+                                   recipient_limit=KeyedLimiter(*recipient_limit) if recipient_limit else None,
+                                   **worker_options)
+            for channel in channels
+        }
+
+    def submit(self, channel, message, recipients=None, priority=None):
+        worker = self.workers.get(channel)
+        if worker is None:
+            raise DeliveryError(f"Canal inconnu: {channel}")
+        return worker.submit(Delivery(channel, message, recipients, priority))
+
+    def fan_out(self, channel, message, chunks, priority=None):
+        """
+        Une livraison par morceau de destinataires (chunks : générateur de listes)
+        Le même message est partagé par tous les morceaux ; retourne un Future global
+        """
+        return gather([self.submit(channel, message, chunk, priority) for chunk in chunks], channel)
+
+    def queue_depths(self):
+        """Nombre de messages en attente par canal"""
+        return {channel: worker.queue.qsize() for channel, worker in self.workers.items()}
+
+    def channel_states(self):
+        """État de chaque canal (disjoncteur, appels en cours, compteurs) pour le dashboard"""
+        return {
+            channel: {
+                **worker.guard.snapshot(),
+                'queued': worker.queue.qsize(),
+                'queued_by_priority': worker.queue.depths(),
+                'sent': worker.sent,
+                'failed': worker.failed,
+                'retried': worker.retried,
+                'throttled_seconds': round(worker.throttled, 3),
+                'deferred': worker.deferred,
+            }
+            for channel, worker in self.workers.items()
+        }
+
+    def close(self, timeout=None):
+        """Arrêt : chaque canal livre ce qui est en file avant de fermer son guard"""
+        for worker in self.workers.values():
+            worker.close(timeout)
+
+
+# Pipeline partagé par les mixins
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """Retourne le pipeline par défaut (créé au premier appel)"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = DeliveryPipeline(rate_limits=channel_limits_from_env(),
+                                             recipient_limit=recipient_limit_from_env())
+                atexit.register(_pipeline.close, 5.0)
+    return _pipeline
+
+
+def set_pipeline(pipeline):
+    """Remplace le pipeline par défaut (ex: FakeTransport pour les benchmarks)"""
+    global _pipeline
+    with _pipeline_lock:
+        previous, _pipeline = _pipeline, pipeline
+    return previous
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    print("=== BENCHMARK DU PIPELINE (transport factice) ===")
+    n_alerts = 300
+    latency = {"batch_latency": 0.01, "message_latency": 0.0005}
+
+    # Envoi séquentiel : un appel bloquant par canal et par alerte
+    transport = FakeTransport(**latency)
+    start = time.perf_counter()
+    for i in range(n_alerts):
+        for channel in CHANNELS:
+            transport.send_batch(channel, [Delivery(channel, f"Alerte {i}")])
+    sequential = time.perf_counter() - start
+    print(f"   Séquentiel: {n_alerts * 3 / sequential:,.0f} messages/s")
+
+    # Pipeline : canaux en parallèle, envoi par lots
+    transport = FakeTransport(**latency)
+    pipeline = DeliveryPipeline(transport)
+    start = time.perf_counter()
+    futures = [pipeline.submit(channel, f"Alerte {i}")
+               for i in range(n_alerts) for channel in CHANNELS]
+    for future in futures:
+        future.result()
+    pipelined = time.perf_counter() - start
+    pipeline.close()
+    print(f"   Pipeline:   {n_alerts * 3 / pipelined:,.0f} messages/s ({transport.batches} lots)")
+
+    # Gabarit partiel : {recipient} complété par le transport, un texte par destinataire
+    from core.templates import MessageTemplate
+    transport = FakeTransport(record=True)
+    pipeline = DeliveryPipeline(transport, rate_limits={})
+    template = MessageTemplate("Bonjour {recipient}, {message}").bind(message="examen en salle B12")
+    pipeline.submit("email", template, ["alice@campus.edu", "bob@campus.edu"]).result()
+    pipeline.close()
+    expected = [("email", "alice@campus.edu", "Bonjour alice@campus.edu, examen en salle B12"),
+                ("email", "bob@campus.edu", "Bonjour bob@campus.edu, examen en salle B12")]
+    assert transport.messages == expected, transport.messages
+    print(f"   Rendu par destinataire : {transport.messages[0][2]!r} ... OK")
@@ -0,0 +1,260 @@
+"""
+Résumés (digest) des alertes peu prioritaires — désactivés par défaut
+Avec DIGEST_MAX_PRIORITY (ex: MEDIUM), les alertes de priorité inférieure ou égale
+ne partent pas une par une : elles sont mises en attente par (canal, audience, langue)
+puis livrées en un seul message combiné
+- à la fin de l'intervalle (une tâche de l'ordonnanceur par canal)
+- ou dès qu'une audience a `max_items` alertes en attente
+Le résumé est composé une fois par audience ; les destinataires ne sont résolus
+qu'à la livraison, par morceaux (comme un envoi direct : l'audience n'est jamais
+matérialisée). URGENT et HIGH ne passent jamais par ici
+"""
+
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future, wait
+
+from core.audience import get_directory
+from core.delivery import get_pipeline
+from core.logs import get_logger
+from core.retry import get_scheduler
+from core.stats import PRIORITIES
+from core.templates import DEFAULT_LOCALE, FALLBACK_LOCALE, concat
+
+logger = get_logger("digest")
+
+DIGEST_QUEUED = "digest"  # Résultat du Future d'une alerte mise en attente
+QUEUED_RESULT = "En attente du prochain résumé"  # Résultat enregistré dans l'historique
+HEADERS = {
+    "fr": "Résumé : {count} notifications",
+    "en": "Digest: {count} notifications",
+}
+
+
+class DigestItem:
+    """Une alerte en attente : texte du canal (ou gabarit partiel) et priorité"""
+    __slots__ = ('message', 'priority', 'created_at')
+
+    def __init__(self, message, priority, created_at):
+        self.message = message
+        self.priority = priority
+        self.created_at = created_at
+
+
+class DigestBuffer:
+    """Alertes en attente pour une audience (None : envoi global) dans une langue"""
+    __slots__ = ('audience', 'locale', 'items')
+
+    def __init__(self, audience, locale):
+        self.audience = audience
+        self.locale = locale
+        self.items = []
+
+
+class Digester:
+    """
+    accepts(priority) : True si l'alerte doit être mise en attente
+    add(canal, message, priority, audience, locale) : mise en attente ; retourne un
+    Future déjà terminé de résultat DIGEST_QUEUED (l'alerte n'est pas encore livrée)
+    """
+    def __init__(self, max_priority="MEDIUM", interval=900.0, max_items=20,
+                 directory=None, scheduler=None):
+        if max_priority not in PRIORITIES:
+            raise ValueError(f"Priorité de résumé inconnue: {max_priority}")
+        if interval <= 0 or max_items < 1:
+            raise ValueError(f"Résumé invalide: intervalle {interval}, {max_items} alertes max")
+        self.max_priority = max_priority
+        self.levels = frozenset(PRIORITIES[PRIORITIES.index(max_priority):])
+        self.interval = interval
+        self.max_items = max_items
+        self.directory = directory
+        self.scheduler = scheduler
+        self._buffers = {}       # canal -> {(clé d'audience, langue): DigestBuffer}
+        self._scheduled = set()  # Canaux dont le vidage périodique est planifié
+        self._lock = threading.Lock()
+        self.alerts = 0          # Alertes mises en attente (une par canal)
+        self.digests = 0         # Résumés livrés (un par audience, découpé en morceaux)
+        self.flushes = 0
+
+    def accepts(self, priority):
+        return priority in self.levels
+
+    def add(self, channel, message, priority, audience=None, locale=None):
+        locale = locale or DEFAULT_LOCALE
+        key = (audience.key() if audience is not None else None, locale)
+        item = DigestItem(message, priority, time.time())
+        with self._lock:
+            buffers = self._buffers.setdefault(channel, {})
+            buffer = buffers.get(key)
+            if buffer is None:
+                buffer = buffers[key] = DigestBuffer(audience, locale)
+            buffer.items.append(item)
+            full = len(buffer.items) >= self.max_items
+            self.alerts += 1
+            schedule = channel not in self._scheduled
+            self._scheduled.add(channel)
+        if schedule:
+            (self.scheduler or get_scheduler()).call_later(self.interval, self._tick, channel)
+        if full:
+            self.flush(channel, [key])
+        done = Future()
+        done.set_result(DIGEST_QUEUED)
+        return done
+
+    def _tick(self, channel):
+        """Fin d'intervalle : le prochain ajout replanifie le vidage"""
+        with self._lock:
+            self._scheduled.discard(channel)
+        self.flush(channel)
+
+    def flush(self, channel=None, keys=None):
+        """
+        Livre les résumés en attente (tous les canaux si channel est None,
+        seulement les audiences `keys` si précisé) ; retourne les Futures des livraisons
+        """
+        if channel is None:
+            return [future for c in list(self._buffers) for future in self.flush(c)]
+        with self._lock:
+            buffers = self._buffers.get(channel, {})
+            if keys is None:
+                taken, self._buffers[channel] = list(buffers.values()), {}
+            else:
+                taken = [buffers.pop(key) for key in keys if key in buffers]
+            self.flushes += 1
+        if not taken:
+            return []
+
+        pipeline = get_pipeline()
+        directory = self.directory or get_directory()
+        futures = []
+        for buffer in taken:
+            message = self.compose(buffer.items, buffer.locale)
+            priority = max(buffer.items, key=_rank).priority
+            if buffer.audience is None:
+                futures.append(pipeline.submit(channel, message, priority=priority))
+            else:
+                chunks = directory.chunks(buffer.audience, channel)
+                futures.append(pipeline.fan_out(channel, message, chunks, priority=priority))
+        with self._lock:
+            self.digests += len(taken)
+        logger.info("[DIGEST] %s : %d résumés, %d alertes", channel, len(taken),
+                    sum(len(buffer.items) for buffer in taken))
+        return futures
+
+    def compose(self, items, locale=None):
+        """
+        Une alerte seule part telle quelle ; sinon en-tête (dans la langue des alertes)
+        + une ligne par alerte. Les champs {recipient} restent à compléter à la livraison
+        """
+        if len(items) == 1:
+            return items[0].message
+        header = HEADERS.get(locale or DEFAULT_LOCALE) or HEADERS[FALLBACK_LOCALE]
+        header = header.format(count=len(items))
+        messages = [item.message for item in items]
+        if all(type(message) is str for message in messages):
+            return header + "".join(f"\n- {message}" for message in messages)
+        pieces = [header]
+        for message in messages:
+            pieces += ["\n- ", message]
+        return concat(pieces)
+
+    def pending(self):
+        """Alertes en attente, tous canaux et audiences confondus"""
+        with self._lock:
+            return sum(len(buffer.items) for buffers in self._buffers.values() for buffer in buffers.values())
+
+    def snapshot(self):
+        pending = self.pending()
+        with self._lock:
+            return {
+                'max_priority': self.max_priority,
+                'interval': self.interval,
+                'max_items': self.max_items,
+                'alerts': self.alerts,
+                'pending': pending,
+                'digests': self.digests,
+                'flushes': self.flushes,
+            }
+
+    def drain(self, timeout=5.0):
+        """Arrêt : livre tout ce qui est en attente et attend les livraisons"""
+        futures = self.flush()
+        if futures:
+            wait(futures, timeout)
+
+
+def _rank(item):
+    """Clé de max() : URGENT = 4 ... LOW = 1, inconnue = 0"""
+    return len(PRIORITIES) - PRIORITIES.index(item.priority) if item.priority in PRIORITIES else 0
+
+
+def digest_from_env():
+    """
+    DIGEST_MAX_PRIORITY ('off' par défaut ; ex: MEDIUM pour résumer LOW et MEDIUM),
+    DIGEST_INTERVAL (secondes, 900) et DIGEST_MAX_ITEMS (20) -> Digester ou None
+    """
+    level = os.environ.get("DIGEST_MAX_PRIORITY", "off").strip().upper()
+    if level == "OFF":
+        return None
+    return Digester(max_priority=level,
+                    interval=float(os.environ.get("DIGEST_INTERVAL", 900)),
+                    max_items=int(os.environ.get("DIGEST_MAX_ITEMS", 20)))
+
+
+# Résumés partagés par les mixins
+_digester = None
+_digester_ready = False
+_digester_lock = threading.Lock()
+
+
+def get_digester():
+    """Résumés par défaut (créés au premier appel), None si désactivés"""
+    global _digester, _digester_ready
+    if not _digester_ready:
+        with _digester_lock:
+            if not _digester_ready:
+                _digester = digest_from_env()
+                if _digester is not None:
+                    # Vidage à l'arrêt : enregistré après le pipeline, donc exécuté avant sa fermeture
+                    get_pipeline()
+                    atexit.register(_digester.drain)
+                _digester_ready = True
+    return _digester
+
+
+def set_digester(digester):
+    """Remplace les résumés par défaut (None pour les désactiver)"""
+    global _digester, _digester_ready
+    with _digester_lock:
+        previous, _digester, _digester_ready = _digester, digester, True
+    return previous
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    from core.audience import Audience, UserDirectory
+    from core.delivery import DeliveryPipeline, FakeTransport, set_pipeline
+    from core.templates import MessageTemplate
+
+    print("=== TEST DES RÉSUMÉS ===")
+    transport = FakeTransport()
+    set_pipeline(DeliveryPipeline(transport, rate_limits={}))
+    directory = UserDirectory()
+    for i in range(3000):
+        directory.add(f"Étudiant {i}", email=f"etu{i}@campus.edu", groups=(f"L{i % 3 + 1}",))
+
+    digester = Digester(max_priority="MEDIUM", interval=0.5, max_items=20, directory=directory)
+    alerts = 60
+    start = time.perf_counter()
+    for i in range(alerts):  # Période chargée : 60 infos académiques, une promo à la fois
+        digester.add("email", f"Info Académique: salle changée ({i})", "LOW", Audience(groups=[f"L{i % 3 + 1}"]))
+    added = time.perf_counter() - start
+    time.sleep(0.8)
+    get_pipeline().close(5.0)
+    print(f"   {alerts} alertes LOW pour 1000 étudiants chacune : {added * 1e6 / alerts:.1f} µs/ajout, "
+          f"{digester.digests} résumés, {transport.sent['email']} livraisons (au lieu de {alerts * 2})")
+    print(f"   {digester.snapshot()}")
+    print(digester.compose([DigestItem("Weather alert: storms", "MEDIUM", 0),
+                            DigestItem(MessageTemplate("Exam moved, {recipient}"), "LOW", 0)], "en"))
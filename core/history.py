@@ -0,0 +1,164 @@
+"""
+Historique des notifications borné en mémoire
+Enregistrements compacts (__slots__) dans un buffer circulaire de taille fixe
+"""
+
+import base64
+import binascii
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_CAPACITY = 1000
+
+_CURSOR = struct.Struct('>dQ')  # (timestamp, id)
+
+
+def encode_cursor(record):
+    """Curseur opaque pointant après `record` (pagination par clé)"""
+    return base64.urlsafe_b64encode(_CURSOR.pack(record.created_at, record.id)).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Retourne (timestamp, id) ; ValueError si le curseur est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return _CURSOR.unpack(raw)
+    except (binascii.Error, struct.error, TypeError):
+        raise ValueError(f"Curseur invalide: {cursor}")
+
+
+def matches(record, alert_type=None, priority=None, since=None, until=None):
+    """Filtres communs aux backends d'historique"""
+    return ((alert_type is None or record.type == alert_type)
+            and (priority is None or record.priority == priority)
+            and (since is None or record.created_at >= since)
+            and (until is None or record.created_at < until))
+
+
+class NotificationRecord:
+    """
+    Enregistrement d'une notification envoyée
+    __slots__ évite un dict par instance ; type/priorité/icône/résultat sont internés
+    """
+    __slots__ = ('id', 'type', 'message', 'priority', 'icon', 'created_at', 'result')
+
+    def __init__(self, id, type, message, priority, icon, created_at, result):
+        self.id = id
+        self.type = sys.intern(type)
+        self.message = message
+        self.priority = sys.intern(priority)
+        self.icon = sys.intern(icon)
+        self.created_at = created_at  # Timestamp epoch (float)
+        self.result = sys.intern(str(result)) if result else ""  # str() : DeliveryHandle
+
+    @property
+    def timestamp(self):
+        """Heure d'envoi formatée (calculée à l'affichage seulement)"""
+        return datetime.fromtimestamp(self.created_at).strftime('%H:%M:%S')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'message': self.message,
+            'priority': self.priority,
+            'icon': self.icon,
+            'timestamp': datetime.fromtimestamp(self.created_at).isoformat(),
+            'result': self.result,
+        }
+
+    def __repr__(self):
+        return f"NotificationRecord({self.id}, {self.type}, {self.priority})"
+
+
+class HistoryStore:
+    """
+    Buffer circulaire de capacité fixe
+    Les plus anciennes notifications sont écrasées quand le buffer est plein
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError(f"Capacité invalide: {capacity}")
+        self.capacity = capacity
+        self._buffer = [None] * capacity
+        self._count = 0  # Nombre total d'ajouts depuis le démarrage
+        self._lock = threading.Lock()
+
+    def append(self, alert_type, message, priority, icon, result="", created_at=None):
+        """Ajoute une notification et retourne l'enregistrement créé"""
+        created_at = time.time() if created_at is None else created_at
+        with self._lock:
+            record = NotificationRecord(self._count + 1, alert_type, message,
+                                        priority, icon, created_at, result)
+            self._buffer[self._count % self.capacity] = record
+            self._count += 1
+        return record
+
+    def latest(self, n):
+        """
+        Les n dernières notifications, de la plus ancienne à la plus récente
+        Équivalent de history[-n:] ; coût proportionnel à n, pas à la taille
+        """
+        with self._lock:
+            n = min(n, len(self))
+            end = self._count
+            return [self._buffer[i % self.capacity] for i in range(end - n, end)]
+
+    def query(self, alert_type=None, priority=None, since=None, until=None, before=None, limit=50):
+        """
+        Générateur des notifications filtrées, de la plus récente à la plus ancienne
+        before=(timestamp, id) reprend après un curseur : les ids étant contigus dans
+        le buffer, la position de départ se calcule en O(1), quelle que soit la page
+        """
+        newest = self._count
+        start = newest if before is None else min(newest, before[1] - 1)
+        oldest = max(1, newest - self.capacity + 1)
+        found = 0
+        for record_id in range(start, oldest - 1, -1):
+            record = self._buffer[(record_id - 1) % self.capacity]
+            if record is None or record.id != record_id:
+                return  # Écrasé pendant la lecture : on s'arrête proprement
+            if since is not None and record.created_at < since:
+                return  # Les suivantes sont plus anciennes
+            if matches(record, alert_type, priority, since, until):
+                yield record
+                found += 1
+                if found >= limit:
+                    return
+
+    @property
+    def total_appended(self):
+        """Nombre total de notifications ajoutées (y compris évincées)"""
+        return self._count
+
+    @property
+    def version(self):
+        """Change à chaque ajout : ETag des pages et clé du cache de fragments"""
+        return self._count
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def __iter__(self):
+        return iter(self.latest(len(self)))
+
+    def memory_footprint(self):
+        """Estimation de la mémoire occupée (octets) : buffer, enregistrements, messages"""
+        total = sys.getsizeof(self._buffer)
+        for record in self.latest(len(self)):
+            total += sys.getsizeof(record) + sys.getsizeof(record.message)
+        return total
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    print("=== TEST DE L'HISTORIQUE ===")
+    store = HistoryStore(capacity=1000)
+    for i in range(5000):
+        store.append("SECURITY", f"Message {i}", "URGENT", "🚨", "Alerte sécurité envoyée sur 3 canaux")
+    print(f"   Taille: {len(store)} / ajoutées: {store.total_appended}")
+    print(f"   5 dernières: {store.latest(5)}")
+    print(f"   Mémoire: {store.memory_footprint() / 1024:.1f} Ko")
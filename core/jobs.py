@@ -0,0 +1,208 @@
+"""
+File de jobs en arrière-plan
+Les routes mettent un job en file et répondent tout de suite (202),
+un pool de workers exécute l'envoi ; backend mémoire ou SQLite (durable)
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from core.scheduling import DRAIN, PriorityQueue
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFullError(Exception):
+    """File de jobs pleine : l'appelant doit réessayer après `retry_after` secondes"""
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Job:
+    """Un job : payload JSON + état d'avancement"""
+    __slots__ = ('id', 'payload', 'status', 'result', 'error', 'progress',
+                 'created_at', 'updated_at')
+
+    def __init__(self, payload, id=None, status=QUEUED, result=None, error=None,
+                 progress=None, created_at=None, updated_at=None):
+        self.id = id or uuid.uuid4().hex
+        self.payload = payload
+        self.status = status
+        self.result = result
+        self.error = error
+        self.progress = progress or {'done': 0, 'total': 0}
+        self.created_at = created_at or time.time()
+        self.updated_at = updated_at or self.created_at
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'payload': self.payload,
+            'result': self.result,
+            'error': self.error,
+            'progress': self.progress,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+
+# ========== BACKENDS ==========
+
+class MemoryJobBackend:
+    """Jobs en mémoire, les plus anciens sont oubliés au-delà de max_jobs"""
+    def __init__(self, max_jobs=10000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            self._jobs.move_to_end(job.id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def pending(self):
+        """Rien à reprendre : la mémoire ne survit pas au redémarrage"""
+        return []
+
+
+class SQLiteJobBackend:
+    """Jobs persistés dans SQLite : les jobs non terminés sont repris au démarrage"""
+    def __init__(self, path="jobs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    progress TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, created_at)")
+            self._conn.commit()
+
+    def save(self, job):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, json.dumps(job.payload), job.status, job.result, job.error,
+                 json.dumps(job.progress), job.created_at, job.updated_at)
+            )
+            self._conn.commit()
+
+    def _load(self, row):
+        id, payload, status, result, error, progress, created_at, updated_at = row
+        return Job(json.loads(payload), id, status, result, error,
+                   json.loads(progress) if progress else None, created_at, updated_at)
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._load(row) if row else None
+
+    def pending(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._load(row) for row in rows]
+
+
+# ========== FILE ET WORKERS ==========
+
+class JobQueue:
+    """
+    Pool de workers qui exécute handler(job) pour chaque job en file
+    handler retourne le résultat (str) et peut mettre à jour job.progress
+    priority(payload) -> niveau : les jobs URGENT passent devant les LOW en attente
+    enqueue attend au plus enqueue_timeout secondes une place dans la file, puis
+    lève QueueFullError (le thread de la requête n'est jamais bloqué indéfiniment)
+    """
+    _stop = object()
+
+    def __init__(self, handler, backend=None, workers=4, queue_size=10000, priority=None,
+                 enqueue_timeout=0.5, retry_after=1.0):
+        self.handler = handler
+        self.backend = backend or MemoryJobBackend()
+        self.priority = priority or (lambda payload: None)
+        self.enqueue_timeout = enqueue_timeout
+        self.retry_after = retry_after
+        self.rejected = 0
+        self._queue = PriorityQueue(maxsize=queue_size)
+        self._active = {}  # Jobs en cours : progression visible sans relire le backend
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        # Reprise des jobs interrompus (backend durable)
+        for job in self.backend.pending():
+            job.status = QUEUED
+            self._queue.put(job, self.priority(job.payload))
+
+    def enqueue(self, payload, block=True):
+        """
+        Met un job en file et le retourne ; QueueFullError si la file reste pleine
+        (block=False : sans attendre, ex: depuis le thread de l'ordonnanceur)
+        """
+        job = Job(payload)
+        self.backend.save(job)
+        try:
+            self._queue.put(job, self.priority(payload), block=block, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.rejected += 1
+            self._update(job, FAILED, error="File de jobs pleine")  # Pas de reprise au redémarrage
+            raise QueueFullError("File de jobs pleine", self.retry_after) from None
+        return job
+
+    def get(self, job_id):
+        return self._active.get(job_id) or self.backend.get(job_id)
+
+    def _update(self, job, status, **fields):
+        job.status = status
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updated_at = time.time()
+        self.backend.save(job)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is self._stop:
+                return
+            self._active[job.id] = job
+            self._update(job, RUNNING)
+            try:
+                result = self.handler(job)
+                self._update(job, DONE, result=str(result))
+            except Exception as e:
+                self._update(job, FAILED, error=str(e))
+            finally:
+                self._active.pop(job.id, None)
+
+    def close(self, timeout=None):
+        for _ in self._threads:
+            self._queue.put(self._stop, DRAIN)
+        for thread in self._threads:
+            thread.join(timeout)
@@ -0,0 +1,85 @@
+"""
+Journalisation non bloquante pour les envois
+Les messages passent par une file (QueueHandler) et sont écrits par un thread
+dédié (QueueListener) ; le formatage est fait dans ce thread, pas dans la requête
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+
+LOGGER_NAME = "notification"
+
+# Attributs standard d'un LogRecord (le reste vient de `extra=`)
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+_lock = threading.Lock()
+
+
+def get_logger(name=None):
+    """Logger du projet : notification.<name>"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par message, avec les champs passés via extra="""
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler qui ne formate pas dans le thread appelant
+    (la file est en mémoire : le LogRecord peut être transmis tel quel)
+    """
+    def prepare(self, record):
+        return record
+
+
+def configure_logging(level=None, json_lines=None, stream=None):
+    """
+    Installe la file et le thread d'écriture (idempotent)
+    level : LOG_LEVEL (INFO par défaut) ; json_lines : LOG_FORMAT=json
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+        level = level or os.environ.get("LOG_LEVEL", "INFO")
+        if json_lines is None:
+            json_lines = os.environ.get("LOG_FORMAT", "").lower() == "json"
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        if json_lines:
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter("%(message)s"))
+
+        log_queue = queue.SimpleQueue()
+        logger = get_logger()
+        logger.setLevel(level)
+        logger.addHandler(LazyQueueHandler(log_queue))
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+        atexit.register(_listener.stop)  # Vide la file à la sortie
+        return _listener
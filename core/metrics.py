@@ -0,0 +1,247 @@
+"""
+Métriques d'exécution : compteurs et histogrammes de latence, format texte Prometheus
+Les histogrammes sont de type HDR : une octave par puissance de 2, découpée en
+sous-buckets linéaires (erreur relative ≤ 6,25 %), dans un tableau de taille fixe.
+Enregistrer une mesure = un calcul d'indice + un incrément sous un verrou très court
+"""
+
+import threading
+import time
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class Histogram:
+    """
+    Histogramme log-linéaire en microsecondes (1 µs à ~12 jours)
+    precision=5 : 16 sous-buckets par octave
+    """
+    __slots__ = ('precision', 'counts', 'count', 'sum', 'max', '_lock')
+
+    def __init__(self, precision=5, max_exponent=40):
+        self.precision = precision
+        half = 1 << (precision - 1)
+        self.counts = [0] * ((1 << precision) + (max_exponent - precision + 1) * half)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def _index(self, micros):
+        if micros < (1 << self.precision):
+            return micros  # Valeurs exactes en dessous de 2**precision µs
+        shift = micros.bit_length() - self.precision
+        half = 1 << (self.precision - 1)
+        index = (1 << self.precision) + (shift - 1) * half + (micros >> shift) - half
+        return min(index, len(self.counts) - 1)
+
+    def _upper_bound(self, index):
+        """Plus grande valeur (µs) du bucket"""
+        full = 1 << self.precision
+        if index < full:
+            return index
+        half = full >> 1
+        shift, offset = divmod(index - full, half)
+        shift += 1
+        return ((half + offset + 1) << shift) - 1
+
+    def record(self, seconds):
+        index = self._index(max(0, int(seconds * 1e6)))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantiles(self, qs=QUANTILES):
+        """{q: secondes} ; borne haute du bucket atteint"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        result = {}
+        if not total:
+            return {q: 0.0 for q in qs}
+        targets = sorted(qs)
+        cumulative = 0
+        i = 0
+        for index, n in enumerate(counts):
+            cumulative += n
+            while i < len(targets) and cumulative >= targets[i] * total:
+                result[targets[i]] = self._upper_bound(index) / 1e6
+                i += 1
+            if i == len(targets):
+                break
+        return result
+
+
+class Timer(Histogram):
+    """Histogramme + nombre d'échecs (une exécution mesurée par @timed)"""
+    __slots__ = ('failures',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failures = 0
+
+    def record(self, seconds, failed=False):
+        index = self._index(max(0, int(seconds * 1e6)))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if failed:
+                self.failures += 1
+
+
+class Counter:
+    """Compteur monotone"""
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+
+class Family:
+    """Une métrique et ses séries par jeu de labels"""
+    def __init__(self, name, kind, help_text, factory):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self._factory = factory
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, self._factory())
+        return series
+
+    def items(self):
+        return list(self._series.items())
+
+
+class Registry:
+    """
+    Familles de métriques + collecteurs
+    Un collecteur est appelé à chaque lecture et produit des
+    (nom, type, aide, labels, valeur) à partir de compteurs existants
+    """
+    def __init__(self):
+        self._families = {}
+        self._collectors = []
+        self._timers = {}  # (métrique, labels) -> Timer : une seule recherche par mesure
+        self._lock = threading.Lock()
+
+    def _family(self, name, kind, help_text, factory):
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.setdefault(name, Family(name, kind, help_text, factory))
+        return family
+
+    def counter(self, name, help_text=""):
+        return self._family(name, "counter", help_text, Counter)
+
+    def histogram(self, name, help_text=""):
+        return self._family(name, "summary", help_text, Histogram)
+
+    def timer(self, metric, help_text=""):
+        """<metric>_seconds (résumé), <metric>_total et <metric>_failures_total"""
+        return self._family(metric, "timer", help_text or metric, Timer)
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def observe(self, metric, labels, seconds, failed=False):
+        """Une exécution mesurée : durée et échec éventuel"""
+        key = (metric, tuple(labels.items()))
+        series = self._timers.get(key)
+        if series is None:
+            series = self._timers[key] = self.timer(metric).labels(**labels)
+        series.record(seconds, failed)
+
+    def render(self):
+        """Format texte d'exposition Prometheus (version 0.0.4)"""
+        lines = []
+        for family in sorted(self._families.values(), key=lambda f: f.name):
+            series = [(dict(key), item) for key, item in family.items()]
+            if family.kind == "counter":
+                lines += _header(family.name, "counter", family.help)
+                lines += [f"{family.name}{_labels(labels)} {item.value}" for labels, item in series]
+                continue
+            if family.kind == "timer":
+                name, help_text = f"{family.name}_seconds", f"Durée de {family.help}"
+            else:
+                name, help_text = family.name, family.help
+            lines += _header(name, "summary", help_text)
+            for labels, item in series:
+                for q, value in item.quantiles().items():
+                    lines.append(f"{name}{_labels({**labels, 'quantile': q})} {value:.6f}")
+                lines.append(f"{name}_sum{_labels(labels)} {item.sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {item.count}")
+            if family.kind == "timer":
+                lines += _header(f"{family.name}_total", "counter", f"Exécutions de {family.help}")
+                lines += [f"{family.name}_total{_labels(labels)} {item.count}" for labels, item in series]
+                lines += _header(f"{family.name}_failures_total", "counter", f"Échecs de {family.help}")
+                lines += [f"{family.name}_failures_total{_labels(labels)} {item.failures}" for labels, item in series]
+
+        collected = {}  # Les lignes d'une métrique doivent être contiguës
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                if name not in collected:
+                    collected[name] = _header(name, kind, help_text)
+                collected[name].append(f"{name}{_labels(labels)} {value}")
+        for samples in collected.values():
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _header(name, kind, help_text):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+_registry = Registry()
+
+
+def get_registry():
+    """Registre partagé (décorateur timed, route /metrics)"""
+    return _registry
+
+
+# ========== BENCHMARK ==========
+if __name__ == "__main__":
+    import random
+
+    print("=== TEST DES HISTOGRAMMES ===")
+    histogram = Histogram()
+    samples = [random.expovariate(1 / 0.005) for _ in range(200000)]
+    start = time.perf_counter()
+    for value in samples:
+        histogram.record(value)
+    elapsed = time.perf_counter() - start
+    exact = sorted(samples)
+    print(f"   Enregistrement : {elapsed * 1e6 / len(samples):.2f} µs/mesure, "
+          f"{len(histogram.counts)} buckets ({len(histogram.counts) * 8 / 1024:.1f} Ko)")
+    for q, value in histogram.quantiles().items():
+        reference = exact[min(len(exact) - 1, int(q * len(exact)))]
+        print(f"   p{q * 100:g} : {value * 1000:.3f} ms (exact {reference * 1000:.3f} ms)")
@@ -1,26 +1,57 @@
 """
 Mixins pour les différents canaux de communication
+Les envois passent par le pipeline de livraison (core.delivery) :
+chaque méthode retourne immédiatement un Future
+Les appels sont mesurés par canal et priorité (@timed, route /metrics)
+audience (core.audience) : destinataires ciblés, envoyés par morceaux
+Les alertes peu prioritaires (LOW/MEDIUM) sont regroupées en résumés (core.digest)
 """
 
+from core.audience import get_directory
+from core.decorators import timed
+from core.delivery import get_pipeline
+from core.digest import get_digester
+from core.scheduling import priority_of
+
+
+def deliver(sender, channel, message, audience=None):
+    """
+    Sans audience : une livraison (comportement historique)
+    Avec audience : destinataires résolus dans l'annuaire et envoyés par morceaux
+    Priorité couverte par les résumés : mise en attente (par audience et langue de l'alerte),
+    livrée plus tard en un message combiné
+    """
+    level = priority_of(sender)
+    digester = get_digester()
+    if digester is not None and digester.accepts(level):
+        return digester.add(channel, message, level, audience, getattr(sender, 'locale', None))
+    if audience is None:
+        return get_pipeline().submit(channel, message, priority=level)
+    chunks = get_directory().chunks(audience, channel)
+    return get_pipeline().fan_out(channel, message, chunks, priority=level)
+
 class SMSMixin:
     """
     Mixin responsable de l'envoi de notifications par SMS
     """
-    def send_sms(self, message):
-        print(f"[SMS] Notification envoyée : {message}")
+    @timed("channel_delivery", channel="sms", priority=priority_of)
+    def send_sms(self, message, audience=None):
+        return deliver(self, "sms", message, audience)
 
 
 class EmailMixin:
     """
     Mixin responsable de l'envoi de notifications par Email
     """
-    def send_email(self, message):
-        print(f"[EMAIL] Notification envoyée : {message}")
+    @timed("channel_delivery", channel="email", priority=priority_of)
+    def send_email(self, message, audience=None):
+        return deliver(self, "email", message, audience)
 
 
 class PushMixin:
     """
     Mixin responsable de l'envoi de notifications Push
     """
-    def send_push(self, message):
-        print(f"[PUSH] Notification envoyée : {message}")
\ No newline at end of file
+    @timed("channel_delivery", channel="push", priority=priority_of)
+    def send_push(self, message, audience=None):
+        return deliver(self, "push", message, audience)
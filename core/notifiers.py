@@ -2,6 +2,10 @@
 Classes de base pour les différents types d'urgence
 """
 
+from core.logs import get_logger
+
+logger = get_logger("notifiers")
+
 class SecurityEmergencyMixin:
     def notify_security(self, message):
         return f"[SÉCURITÉ] Alerte critique : {message}"
@@ -37,22 +41,24 @@ class EmergencyNotifier(
     
     def display_mro(self):
         """Affiche le MRO (Method Resolution Order)"""
-        print(f"\n=== MRO de {self.__class__.__name__} ===")
+        logger.info("=== MRO de %s ===", self.__class__.__name__)
         for i, cls in enumerate(self.__class__.__mro__):
-            print(f"{i}. {cls}")
+            logger.info("%d. %s", i, cls)
         return self.__class__.__mro__
     
     def test_all(self, message):
         """Teste toutes les méthodes héritées"""
-        print(f"\n=== Test des mixins pour: {message} ===")
-        print(self.notify_security(message))
-        print(self.notify_weather(message))
-        print(self.notify_health(message))
-        print(self.notify_academic(message))
+        logger.info("=== Test des mixins pour: %s ===", message)
+        logger.info(self.notify_security(message))
+        logger.info(self.notify_weather(message))
+        logger.info(self.notify_health(message))
+        logger.info(self.notify_academic(message))
 
 
 # Pour tester directement
 if __name__ == "__main__":
+    from core.logs import configure_logging
+    configure_logging()
     notifier = EmergencyNotifier("Testeur")
     notifier.display_mro()
     notifier.test_all("Incident sur le campus")
\ No newline at end of file
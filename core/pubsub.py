@@ -0,0 +1,141 @@
+"""
+Diffusion en direct (publish/subscribe) pour le flux SSE du dashboard
+Chaque événement est sérialisé une seule fois et ajouté à un journal circulaire
+partagé ; chaque abonné n'est qu'un curseur dans ce journal et récupère d'un
+coup tout ce qui est arrivé depuis sa dernière lecture. Un client trop lent
+perd les plus vieux messages (il est marqué `lagged`), il ne bloque jamais l'envoi
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+from core.logs import get_logger
+
+logger = get_logger("pubsub")
+
+
+def format_event(event, data):
+    """Message Server-Sent Events prêt à écrire sur la connexion"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class Subscription:
+    """Curseur d'un abonné dans le journal du hub"""
+    def __init__(self, hub, cursor):
+        self.hub = hub
+        self.cursor = cursor  # Dernier numéro de séquence lu
+        self.dropped = 0
+        self.lagged = False
+
+    def read(self, timeout=None):
+        """Messages arrivés depuis la dernière lecture (liste vide après `timeout` secondes)"""
+        return self.hub._read(self, timeout)
+
+    def skip(self):
+        """Ignore tout ce qui est en attente (après une resynchronisation complète)"""
+        with self.hub._cond:
+            self.cursor = self.hub._seq
+            self.lagged = False
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class PubSubHub:
+    """
+    Journal circulaire de `history` messages numérotés
+    publish() est en O(1) quel que soit le nombre d'abonnés
+    """
+    def __init__(self, history=1000):
+        self._log = deque(maxlen=history)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.subscribers = 0
+        self.published = 0
+
+    def subscribe(self):
+        with self._cond:
+            self.subscribers += 1
+            subscription = Subscription(self, self._seq)
+        logger.debug("[PUBSUB] Abonné ajouté (%d connectés)", self.subscribers)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._cond:
+            self.subscribers -= 1
+
+    def publish(self, event, data):
+        message = format_event(event, data)  # Sérialisé une fois pour tous les abonnés
+        with self._cond:
+            self._seq += 1
+            self._log.append(message)
+            self.published += 1
+            self._cond.notify_all()
+
+    def _read(self, subscription, timeout):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > subscription.cursor, timeout):
+                return []
+            oldest = self._seq - len(self._log) + 1
+            start = subscription.cursor + 1
+            if start < oldest:  # L'abonné a été dépassé : messages perdus
+                subscription.dropped += oldest - start
+                subscription.lagged = True
+                start = oldest
+            messages = list(itertools.islice(self._log, start - oldest, None))
+            subscription.cursor = self._seq
+            return messages
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """Hub partagé (créé au premier appel)"""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = PubSubHub()
+    return _hub
+
+
+# ========== BENCHMARK ==========
+if __name__ == "__main__":
+    import sys
+
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(f"=== DIFFUSION : {events} événements -> {subscribers} abonnés ===")
+
+    hub = PubSubHub(history=events)
+    subs = [hub.subscribe() for _ in range(subscribers)]
+    received = [0] * subscribers
+
+    def consume(index, subscription):
+        while received[index] + subscription.dropped < events:
+            messages = subscription.read(timeout=1.0)
+            if not messages:
+                break
+            received[index] += len(messages)
+
+    threads = [threading.Thread(target=consume, args=(i, s), daemon=True) for i, s in enumerate(subs)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for i in range(events):
+        hub.publish("stats", {"total": 1, "security": 1, "urgent": 1})
+    published = time.perf_counter() - start
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - start
+
+    delivered = sum(received)
+    print(f"   Publication : {published * 1000:.1f} ms ({events / published:,.0f} événements/s)")
+    print(f"   Livrés      : {delivered:,} messages en {total:.2f} s ({delivered / total:,.0f} messages/s)")
+    print(f"   Perdus      : {sum(s.dropped for s in subs)}")
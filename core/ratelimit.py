@@ -0,0 +1,153 @@
+"""
+Limitation de débit par seaux à jetons (token buckets)
+- par canal : quota du fournisseur (le worker attend ses jetons, les messages restent en file)
+- par destinataire : plafond d'envois vers une même adresse
+- par client API : 429 + Retry-After
+Chaque mise à jour est en O(1) : les jetons sont recalculés paresseusement à l'accès,
+sous un verrou très court (aucun thread de recharge)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PERIODS = {"s": 1.0, "min": 60.0, "h": 3600.0}
+
+# Quotas par défaut des fournisseurs (messages, période[:rafale])
+DEFAULT_CHANNEL_LIMITS = {"sms": "30/s:60", "email": "100/s:200", "push": "500/s:1000"}
+DEFAULT_RECIPIENT_LIMIT = "10/min"
+DEFAULT_API_LIMIT = "100/s:2000"
+
+
+def parse_rate(spec):
+    """'30/s', '10/min', '100/h:500' -> (jetons par seconde, capacité) ; None si 'off'"""
+    if spec is None or spec.strip().lower() in ("", "off", "none"):
+        return None
+    rate, _, burst = spec.partition(":")
+    count, _, period = rate.partition("/")
+    try:
+        count = float(count)
+        per_second = count / PERIODS[period.strip() or "s"]
+        return per_second, float(burst) if burst else count
+    except (KeyError, ValueError):
+        raise ValueError(f"Limite de débit invalide: {spec!r} (ex: 30/s, 10/min:20)")
+
+
+class TokenBucket:
+    """
+    `rate` jetons par seconde, au plus `capacity` en réserve
+    Une demande plus grande que la capacité passe quand le seau est plein
+    (le solde devient négatif : les demandes suivantes attendent d'autant)
+    """
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', '_lock')
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, n=1, now=None):
+        """Consomme n jetons si disponibles ; sinon retourne le délai d'attente (secondes)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._refill(now)
+            needed = min(n, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= n
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def acquire(self, n=1):
+        """Attend les jetons (thread dédié : worker de canal) ; retourne le temps attendu"""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(n)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class KeyedLimiter:
+    """
+    Un seau par clé (destinataire, client API), créé à la demande
+    Au-delà de max_keys, les clés les moins récemment utilisées sont oubliées (LRU)
+    """
+    def __init__(self, rate, capacity=None, max_keys=100000):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # clé -> [jetons, dernière mise à jour]
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def try_acquire(self, key, n=1, now=None):
+        """0.0 si autorisé (jetons consommés), sinon le délai avant d'avoir n jetons"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._buckets.get(key)
+            if state is None:
+                state = self._buckets[key] = [self.capacity, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                state[0] = min(self.capacity, state[0] + (now - state[1]) * self.rate)
+                state[1] = now
+            if state[0] >= n:
+                state[0] -= n
+                return 0.0
+            self.limited += 1
+            return (n - state[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def channel_limits_from_env():
+    """CHANNEL_RATE_LIMITS='sms=30/s:60,email=100/s' (ou 'off') -> {canal: (débit, capacité)}"""
+    spec = os.environ.get("CHANNEL_RATE_LIMITS")
+    if spec is not None and spec.strip().lower() == "off":
+        return {}
+    limits = dict(DEFAULT_CHANNEL_LIMITS)
+    for part in filter(None, (spec or "").split(",")):
+        channel, _, rate = part.partition("=")
+        limits[channel.strip()] = rate
+    return {channel: parsed for channel, rate in limits.items() if (parsed := parse_rate(rate))}
+
+
+def recipient_limit_from_env():
+    """RECIPIENT_RATE_LIMIT='10/min' (ou 'off') -> (débit, capacité) ou None"""
+    return parse_rate(os.environ.get("RECIPIENT_RATE_LIMIT", DEFAULT_RECIPIENT_LIMIT))
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    print("=== TEST DES LIMITES DE DÉBIT ===")
+    bucket = TokenBucket(rate=100, capacity=10)
+    start = time.perf_counter()
+    for _ in range(60):
+        bucket.acquire()
+    print(f"   60 jetons à 100/s (rafale 10) : {time.perf_counter() - start:.2f} s (attendu ~0.50 s)")
+
+    limiter = KeyedLimiter(*parse_rate("10/min"))
+    allowed = sum(1 for _ in range(25) if not limiter.try_acquire("+33600000001"))
+    print(f"   25 SMS vers le même numéro, plafond 10/min : {allowed} autorisés, "
+          f"attente suivante {limiter.try_acquire('+33600000001'):.1f} s")
+
+    start = time.perf_counter()
+    for i in range(200000):
+        limiter.try_acquire(i % 50000)
+    print(f"   200 000 vérifications sur 50 000 clés : {(time.perf_counter() - start) * 1e6 / 200000:.2f} µs/appel")
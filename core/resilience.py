@@ -0,0 +1,199 @@
+"""
+Isolation des canaux : disjoncteur, limite de concurrence et délai par appel
+Un fournisseur dégradé échoue vite au lieu de bloquer tous les workers
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from core.logs import get_logger
+
+logger = get_logger("resilience")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class ChannelUnavailable(Exception):
+    """Appel refusé ou abandonné par la protection du canal"""
+    pass
+
+
+class CircuitOpenError(ChannelUnavailable):
+    """Le disjoncteur est ouvert : appel refusé sans contacter le fournisseur"""
+    pass
+
+
+class ConcurrencyLimitError(ChannelUnavailable):
+    """Trop d'appels en cours sur le canal : la charge est délestée"""
+    pass
+
+
+class DeadlineExceeded(ChannelUnavailable):
+    """L'appel a dépassé son délai"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états
+    - closed : les appels passent ; failure_threshold échecs consécutifs -> open
+    - open : tout est refusé pendant recovery_timeout secondes -> half_open
+    - half_open : half_open_max_calls appels d'essai ; succès -> closed, échec -> open
+    """
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0, half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    def allow(self):
+        """True si un appel peut passer (réserve un essai en half_open)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("[BREAKER] %s refermé", self.name)
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("[BREAKER] %s ouvert après %d échecs", self.name, self._failures)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'failures': self._failures,
+                'rejected': self.rejected,
+            }
+
+
+class ChannelGuard:
+    """
+    Protège les appels à un fournisseur : disjoncteur + sémaphore + délai
+    Un appel qui dépasse `timeout` est compté en échec ; son slot reste pris
+    jusqu'à sa fin réelle, donc un fournisseur bloqué finit par délester
+    Les appels tournent sur les threads du guard (pas un ThreadPoolExecutor, arrêté par
+    concurrent.futures avant les handlers atexit) : close() les arrête, après le vidage du pipeline
+    """
+    def __init__(self, name, max_concurrency=4, timeout=10.0, breaker=None, **breaker_options):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(name, **breaker_options)
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._calls = queue.SimpleQueue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.timeouts = 0
+        self.shed = 0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"guard-{name}-{i}", daemon=True)
+            for i in range(max_concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            call = self._calls.get()
+            if call is None:
+                return
+            future, fn, args = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _submit(self, fn, *args):
+        if self._closed:
+            raise ChannelUnavailable(f"{self.name}: canal fermé")
+        future = Future()
+        self._calls.put((future, fn, args))
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def call(self, fn, *args):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Disjoncteur {self.name} ouvert")
+        if not self._slots.acquire(blocking=False):
+            self.shed += 1
+            self.breaker.record_failure()
+            raise ConcurrencyLimitError(f"{self.name}: {self.max_concurrency} appels déjà en cours")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._submit(fn, *args)
+        except Exception:
+            self._release(None)  # Jamais lancé : ni slot ni échec du fournisseur
+            raise
+        future.add_done_callback(self._release)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self.timeouts += 1
+            self.breaker.record_failure()
+            raise DeadlineExceeded(f"{self.name}: délai de {self.timeout}s dépassé")
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def close(self, timeout=None):
+        """Termine les appels en cours puis arrête les threads"""
+        self._closed = True
+        for _ in self._threads:
+            self._calls.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def snapshot(self):
+        return {
+            **self.breaker.snapshot(),
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'timeouts': self.timeouts,
+            'shed': self.shed,
+        }
@@ -0,0 +1,166 @@
+"""
+Réessais non bloquants : backoff exponentiel avec jitter
+Les réessais sont planifiés sur un ordonnanceur à tas (un seul thread)
+au lieu de bloquer le thread appelant avec time.sleep()
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.logs import get_logger
+
+logger = get_logger("retry")
+
+
+class RetryError(Exception):
+    """Échec définitif après toutes les tentatives (l'erreur d'origine est dans __cause__)"""
+    def __init__(self, message, attempts=0):
+        super().__init__(message)
+        self.attempts = attempts
+
+
+class RetryPolicy:
+    """
+    Délai avant le réessai n : base_delay * multiplier**(n-1), plafonné à max_delay
+    jitter=True : délai tiré uniformément dans [0, délai] (évite les vagues synchronisées)
+    """
+    def __init__(self, max_retries=3, base_delay=1.0, multiplier=2.0, max_delay=60.0, jitter=True):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, retry):
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (retry - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class RetryBudget:
+    """Nombre maximum de réessais en attente (ex: par canal)"""
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                return False
+            self.pending += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.pending -= 1
+
+
+class RetryScheduler:
+    """
+    Ordonnanceur à tas : schedule(delay, fn, *args) exécute fn plus tard
+    sur le thread de l'ordonnanceur (fn doit être courte : re-mise en file, etc. ;
+    un travail long est seulement soumis à un exécuteur, cf. get_retry_executor)
+    """
+    def __init__(self, dead_letter_size=1000):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._retries = 0  # Réessais encore dans le tas (pas les autres minuteries)
+        self.dead_letters = deque(maxlen=dead_letter_size)
+        self.metrics = {'attempts': 0, 'retries': 0, 'dead_letters': 0,
+                        'delay_total': 0.0, 'delay_max': 0.0}
+        self._metrics_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="retry-scheduler", daemon=True)
+        self._thread.start()
+
+    def schedule(self, delay, fn, *args):
+        """Planifie un réessai (comptabilisé dans les métriques)"""
+        self._push(delay, fn, args, True)
+        self.record_retry(delay)
+
+    def call_later(self, delay, fn, *args):
+        """Planifie une tâche quelconque, sans toucher aux métriques de réessai"""
+        self._push(delay, fn, args, False)
+
+    def _push(self, delay, fn, args, retry):
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), fn, args, retry))
+            if retry:
+                self._retries += 1
+            self._cond.notify()
+
+    def record_attempt(self, count=1):
+        with self._metrics_lock:
+            self.metrics['attempts'] += count
+
+    def record_retry(self, delay):
+        """Comptabilise un réessai et le délai réellement appliqué"""
+        with self._metrics_lock:
+            self.metrics['retries'] += 1
+            self.metrics['delay_total'] += delay
+            self.metrics['delay_max'] = max(self.metrics['delay_max'], delay)
+
+    def dead_letter(self, item, error):
+        """Conserve un élément abandonné (les plus anciens sont oubliés)"""
+        self.dead_letters.append((time.time(), item, str(error)))
+        with self._metrics_lock:
+            self.metrics['dead_letters'] += 1
+
+    def pending(self):
+        """Réessais pas encore échus (décomptés dès qu'ils sont passés à leur exécuteur)"""
+        with self._cond:
+            return self._retries
+
+    def snapshot(self):
+        """Métriques : tentatives, réessais planifiés, délais appliqués, dead letters"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics['delay_avg'] = metrics['delay_total'] / metrics['retries'] if metrics['retries'] else 0.0
+        metrics['pending'] = self.pending()
+        return metrics
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                _, _, fn, args, retry = heapq.heappop(self._heap)
+                if retry:
+                    self._retries -= 1
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error("[RETRY] Tâche planifiée en échec: %s", e)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Ordonnanceur partagé (créé au premier appel)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RetryScheduler()
+    return _scheduler
+
+
+_executor = None
+
+
+def get_retry_executor():
+    """Threads qui exécutent les réessais de @retry_on_failure (créés au premier appel)"""
+    global _executor
+    if _executor is None:
+        with _scheduler_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retry-worker")
+    return _executor
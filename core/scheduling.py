@@ -0,0 +1,128 @@
+"""
+Ordonnancement par priorité des envois : URGENT > HIGH > MEDIUM > LOW
+File multi-niveaux servie en round-robin pondéré : sous charge, chaque cycle
+sert jusqu'à 8 URGENT, 4 HIGH, 2 MEDIUM et 1 LOW. Un URGENT n'attend donc jamais
+derrière un arriéré de LOW, et LOW garde une part minimale (pas de famine)
+Chaque niveau a sa propre borne : un flot de LOW ne bloque pas l'admission des URGENT
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+from core.stats import PRIORITIES
+
+DEFAULT_WEIGHTS = {"URGENT": 8, "HIGH": 4, "MEDIUM": 2, "LOW": 1}
+DEFAULT_PRIORITY = "MEDIUM"
+DRAIN = "DRAIN"  # Niveau servi seulement quand tout le reste est vide (signal d'arrêt)
+
+
+def priority_of(obj):
+    """
+    Priorité d'une alerte : self.priority (défini dans __init__),
+    sinon celle posée par le décorateur @priority sur send (send.priority_level)
+    """
+    level = getattr(obj, "priority", None)
+    if level in PRIORITIES:
+        return level
+    return getattr(getattr(type(obj), "send", None), "priority_level", None)
+
+
+class PriorityQueue:
+    """
+    Remplaçant de queue.Queue : put(item, priority) / get()
+    maxsize borne chaque niveau séparément ; une priorité inconnue vaut `default`
+    """
+    def __init__(self, maxsize=0, weights=None, default=DEFAULT_PRIORITY):
+        self.maxsize = maxsize
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        rank = {level: i for i, level in enumerate(PRIORITIES)}
+        self.levels = sorted(self.weights, key=lambda level: rank.get(level, len(rank)))
+        self.default = default if default in self.weights else self.levels[-1]
+        self._queues = {level: deque() for level in self.levels}
+        self._drain = deque()
+        self._credits = dict(self.weights)
+        self._size = 0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = {level: threading.Condition(self._mutex) for level in self.levels}
+        self.served = dict.fromkeys(self.levels, 0)
+
+    def put(self, item, priority=None, block=True, timeout=None):
+        with self._mutex:
+            if priority == DRAIN:
+                self._drain.append(item)  # Hors quota : close() ne bloque jamais
+                self._not_empty.notify()
+                return
+            level = priority if priority in self._queues else self.default
+            items = self._queues[level]
+            if self.maxsize > 0:
+                not_full = self._not_full[level]
+                if not block:
+                    if len(items) >= self.maxsize:
+                        raise queue.Full
+                elif timeout is None:
+                    while len(items) >= self.maxsize:
+                        not_full.wait()
+                else:
+                    deadline = time.monotonic() + timeout
+                    while len(items) >= self.maxsize:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise queue.Full
+                        not_full.wait(remaining)
+            items.append(item)
+            self._size += 1
+            self._not_empty.notify()
+
+    def put_nowait(self, item, priority=None):
+        self.put(item, priority, block=False)
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if not block:
+                if not self._size and not self._drain:
+                    raise queue.Empty
+            elif timeout is None:
+                while not self._size and not self._drain:
+                    self._not_empty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._size and not self._drain:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+            if not self._size:
+                return self._drain.popleft()
+            return self._pop()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def _pop(self):
+        """Round-robin pondéré (appelé sous verrou, au moins un niveau non vide)"""
+        for level in self.levels:
+            if self._queues[level] and self._credits[level] > 0:
+                return self._take(level)
+        # Les niveaux en attente ont épuisé leurs crédits : nouveau cycle
+        self._credits = dict(self.weights)
+        for level in self.levels:
+            if self._queues[level]:
+                return self._take(level)
+
+    def _take(self, level):
+        self._credits[level] -= 1
+        self._size -= 1
+        self.served[level] += 1
+        self._not_full[level].notify()
+        return self._queues[level].popleft()
+
+    def qsize(self):
+        return self._size
+
+    def depths(self):
+        """Nombre d'éléments en attente par niveau"""
+        with self._mutex:
+            return {level: len(items) for level, items in self._queues.items()}
@@ -0,0 +1,362 @@
+"""
+Historique et statistiques en mémoire partagée (mmap) pour plusieurs workers
+Un fichier mappé (par défaut dans /dev/shm) contient :
+- un en-tête : nombre total d'ajouts (= version de l'historique)
+- un bloc de compteurs : total, par type, par priorité, fenêtres par minute et par heure
+- un buffer circulaire d'enregistrements de taille fixe
+Tous les processus d'une même machine (workers gunicorn) voient le même état.
+Les écritures sont sérialisées par un verrou de fichier (flock) ; les lectures
+ne prennent aucun verrou : elles lisent en place (struct.unpack_from) et sont
+validées par des numéros de séquence (seqlock) pour ignorer une écriture en cours
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from core.history import DEFAULT_CAPACITY, NotificationRecord, matches
+from core.logs import get_logger
+from core.stats import ALERT_TYPES, PRIORITIES
+
+logger = get_logger("shm")
+
+MAGIC = b"NOTIFSHM"
+LAYOUT_VERSION = 1
+
+# En-tête : magic, version du format, capacité, nombre d'ajouts, séquence des compteurs
+_HEADER = struct.Struct("<8sIIQQ")
+_COUNTERS = struct.Struct(f"<{1 + len(ALERT_TYPES) + len(PRIORITIES)}Q")
+_BUCKET = struct.Struct("<qQ")  # (époque, nombre)
+_SEQ = struct.Struct("<Q")
+
+MINUTE_BUCKETS, HOUR_BUCKETS = 60, 24
+READ_RETRIES = 1000  # Lectures sans verrou avant de lire sous le verrou (écrivain mort en cours d'écriture)
+COUNTERS_OFFSET = 64
+MINUTES_OFFSET = COUNTERS_OFFSET + 128
+HOURS_OFFSET = MINUTES_OFFSET + MINUTE_BUCKETS * _BUCKET.size
+RECORDS_OFFSET = 2048
+
+# Enregistrement : séquence, id, date, type, priorité, icône, résultat, message (UTF-8, tronqué)
+MESSAGE_MAX = 256
+_RECORD = struct.Struct(f"<QQd16s8s16s96s{MESSAGE_MAX}s")
+
+
+def default_path():
+    """SHM_PATH, sinon /dev/shm (mémoire, pas de disque) ou le répertoire temporaire"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.environ.get("SHM_PATH", os.path.join(directory, "notification_project.shm"))
+
+
+def _encode(value, size):
+    """UTF-8 tronqué à `size` octets sans couper un caractère"""
+    raw = value.encode("utf-8")
+    if len(raw) > size:
+        raw = raw[:size].decode("utf-8", "ignore").encode("utf-8")
+    return raw
+
+
+def _decode(raw):
+    return raw.rstrip(b"\0").decode("utf-8")
+
+
+class SharedSegment:
+    """
+    Fichier mappé partagé + verrou d'écriture inter-processus
+    Le premier processus crée et initialise le fichier (sous flock) ;
+    les suivants vérifient que le format et la capacité correspondent
+    """
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY):
+        self.path = path or default_path()
+        self.capacity = capacity
+        self.size = RECORDS_OFFSET + capacity * _RECORD.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = os.getpid()
+        self._thread_lock = threading.Lock()  # flock est par fichier ouvert, pas par thread
+        with self.locked():
+            existing = os.fstat(self._fd).st_size
+            if existing == 0:
+                os.ftruncate(self._fd, self.size)
+            elif existing != self.size:
+                raise ValueError(f"{self.path} a une autre capacité ({existing} octets au lieu de "
+                                 f"{self.size}) : supprimez-le ou gardez HISTORY_CAPACITY")
+            self.buffer = mmap.mmap(self._fd, self.size)
+            magic, layout, stored_capacity, _, _ = _HEADER.unpack_from(self.buffer, 0)
+            if magic != MAGIC:
+                _HEADER.pack_into(self.buffer, 0, MAGIC, LAYOUT_VERSION, capacity, 0, 0)
+                logger.info("[SHM] Segment créé : %s (%d enregistrements)", self.path, capacity)
+            elif layout != LAYOUT_VERSION or stored_capacity != capacity:
+                raise ValueError(f"{self.path} : format {layout}/capacité {stored_capacity} incompatibles")
+
+    @contextmanager
+    def locked(self):
+        """Section critique d'écriture, exclusive entre threads et entre processus"""
+        if self._pid != os.getpid():
+            # Après fork (gunicorn --preload) le descripteur hérité est partagé avec le parent :
+            # flock ne distinguerait pas les workers. Le mapping reste valide (MAP_SHARED)
+            self._fd = os.open(self.path, os.O_RDWR)
+            self._pid = os.getpid()
+            self._thread_lock = threading.Lock()
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # Champs de l'en-tête (entiers alignés sur 8 octets : lecture sans verrou)
+    @property
+    def count(self):
+        return _SEQ.unpack_from(self.buffer, 16)[0]
+
+    def set_count(self, value):
+        _SEQ.pack_into(self.buffer, 16, value)
+
+    @property
+    def stats_seq(self):
+        return _SEQ.unpack_from(self.buffer, 24)[0]
+
+    def set_stats_seq(self, value):
+        _SEQ.pack_into(self.buffer, 24, value)
+
+    def close(self):
+        self.buffer.close()
+        os.close(self._fd)
+
+
+class SharedHistoryStore:
+    """
+    Même interface que core.history.HistoryStore, dans le segment partagé
+    Chaque emplacement porte une séquence : 2*id une fois écrit, 2*id+1 pendant l'écriture.
+    Un lecteur qui ne trouve pas la séquence attendue avant ET après sa lecture
+    ignore l'emplacement (écrasé ou en cours d'écriture)
+    """
+    def __init__(self, segment):
+        self.segment = segment
+        self.capacity = segment.capacity
+
+    def _offset(self, record_id):
+        return RECORDS_OFFSET + ((record_id - 1) % self.capacity) * _RECORD.size
+
+    def append(self, alert_type, message, priority, icon, result="", created_at=None):
+        created_at = time.time() if created_at is None else created_at
+        buffer = self.segment.buffer
+        with self.segment.locked():
+            record_id = self.segment.count + 1
+            offset = self._offset(record_id)
+            _SEQ.pack_into(buffer, offset, 2 * record_id + 1)
+            _RECORD.pack_into(buffer, offset, 2 * record_id + 1, record_id, created_at,
+                              _encode(alert_type, 16), _encode(priority, 8), _encode(icon, 16),
+                              _encode(str(result) if result else "", 96), _encode(message, MESSAGE_MAX))
+            _SEQ.pack_into(buffer, offset, 2 * record_id)
+            self.segment.set_count(record_id)  # Visible des lecteurs une fois complet
+        return NotificationRecord(record_id, alert_type, message, priority, icon, created_at, result)
+
+    def _read(self, record_id):
+        """Enregistrement lu en place, ou None s'il a été écrasé pendant la lecture"""
+        buffer = self.segment.buffer
+        offset = self._offset(record_id)
+        fields = _RECORD.unpack_from(buffer, offset)
+        if fields[0] != 2 * record_id or _SEQ.unpack_from(buffer, offset)[0] != 2 * record_id:
+            return None
+        _, _, created_at, alert_type, priority, icon, result, message = fields
+        return NotificationRecord(record_id, _decode(alert_type), _decode(message), _decode(priority),
+                                  _decode(icon), created_at, _decode(result))
+
+    def latest(self, n):
+        """Les n dernières notifications, de la plus ancienne à la plus récente"""
+        end = self.segment.count
+        records = (self._read(i) for i in range(max(1, end - min(n, self.capacity) + 1), end + 1))
+        return [record for record in records if record is not None]
+
+    def query(self, alert_type=None, priority=None, since=None, until=None, before=None, limit=50):
+        """Générateur filtré, du plus récent au plus ancien (mêmes règles que HistoryStore.query)"""
+        newest = self.segment.count
+        start = newest if before is None else min(newest, before[1] - 1)
+        oldest = max(1, newest - self.capacity + 1)
+        found = 0
+        for record_id in range(start, oldest - 1, -1):
+            record = self._read(record_id)
+            if record is None:
+                return  # Écrasé par un autre worker : on s'arrête proprement
+            if since is not None and record.created_at < since:
+                return
+            if matches(record, alert_type, priority, since, until):
+                yield record
+                found += 1
+                if found >= limit:
+                    return
+
+    @property
+    def total_appended(self):
+        return self.segment.count
+
+    @property
+    def version(self):
+        """Identique dans tous les workers : mêmes ETag quel que soit le processus servi"""
+        return self.segment.count
+
+    def __len__(self):
+        return min(self.segment.count, self.capacity)
+
+    def __iter__(self):
+        return iter(self.latest(len(self)))
+
+    def memory_footprint(self):
+        return self.segment.size
+
+
+class SharedStats:
+    """
+    Même interface que core.stats.StatsAggregator, compteurs dans le segment partagé
+    Écriture sous le verrou du segment, encadrée par la séquence des compteurs
+    (impaire pendant la mise à jour) ; une lecture recommence si elle a changé,
+    au plus READ_RETRIES fois avant de lire sous le verrou
+    Une séquence impaire vue sous le verrou vient d'un processus mort en pleine écriture
+    (flock est libéré à sa mort) : elle est réparée
+    Seuls les types et priorités connus (ALERT_TYPES, PRIORITIES) ont un compteur
+    """
+    def __init__(self, segment):
+        self.segment = segment
+        self._types = {name: i for i, name in enumerate(ALERT_TYPES, start=1)}
+        self._priorities = {name: i for i, name in enumerate(PRIORITIES, start=1 + len(ALERT_TYPES))}
+
+    @property
+    def total(self):
+        return _SEQ.unpack_from(self.segment.buffer, COUNTERS_OFFSET)[0]
+
+    def _add(self, index, n):
+        offset = COUNTERS_OFFSET + 8 * index
+        _SEQ.pack_into(self.segment.buffer, offset, _SEQ.unpack_from(self.segment.buffer, offset)[0] + n)
+
+    def _bucket_add(self, base, size, bucket_seconds, now, n):
+        epoch = int(now // bucket_seconds)
+        offset = base + (epoch % size) * _BUCKET.size
+        stored, count = _BUCKET.unpack_from(self.segment.buffer, offset)
+        _BUCKET.pack_into(self.segment.buffer, offset, epoch, count + n if stored == epoch else n)
+
+    def _series(self, base, size, bucket_seconds, now):
+        epoch = int(now // bucket_seconds)
+        values = []
+        for e in range(epoch - size + 1, epoch + 1):
+            stored, count = _BUCKET.unpack_from(self.segment.buffer, base + (e % size) * _BUCKET.size)
+            values.append(count if stored == e else 0)
+        return values
+
+    def _update(self, changes, now=None):
+        """changes : [(type, priorité, nombre)] appliqués en une seule section critique"""
+        with self.segment.locked():
+            seq = self._repaired_seq()
+            self.segment.set_stats_seq(seq + 1)
+            for alert_type, priority, count in changes:
+                self._add(0, count)
+                if alert_type in self._types:
+                    self._add(self._types[alert_type], count)
+                if priority in self._priorities:
+                    self._add(self._priorities[priority], count)
+                if now is not None:
+                    self._bucket_add(MINUTES_OFFSET, MINUTE_BUCKETS, 60, now, count)
+                    self._bucket_add(HOURS_OFFSET, HOUR_BUCKETS, 3600, now, count)
+            self.segment.set_stats_seq(seq + 2)
+
+    def _repaired_seq(self):
+        """Séquence paire (appelé sous verrou)"""
+        seq = self.segment.stats_seq
+        if seq % 2:
+            logger.warning("[SHM] Écriture des statistiques interrompue (processus mort) : séquence réparée")
+            seq += 1
+            self.segment.set_stats_seq(seq)
+        return seq
+
+    def record(self, alert_type, priority, timestamp=None, count=1):
+        """`count` notifications (un job entier) : un seul verrou et une seule séquence"""
+        self._update([(alert_type, priority, count)], time.time() if timestamp is None else timestamp)
+
+    def restore(self, counts):
+        """Totaux sans date (fenêtres glissantes inchangées)"""
+        self._update(counts)
+
+    def _consistent(self, read):
+        """Relit tant qu'une écriture a eu lieu pendant la lecture, puis lit sous le verrou"""
+        for _ in range(READ_RETRIES):
+            seq = self.segment.stats_seq
+            if seq % 2 == 0:
+                result = read()
+                if self.segment.stats_seq == seq:
+                    return result
+            time.sleep(0)
+        with self.segment.locked():
+            self._repaired_seq()
+            return read()
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+
+        def read():
+            counters = _COUNTERS.unpack_from(self.segment.buffer, COUNTERS_OFFSET)
+            minutes = self._series(MINUTES_OFFSET, MINUTE_BUCKETS, 60, now)
+            stats = {'total': counters[0]}
+            for name, index in self._types.items():
+                stats[name.lower()] = counters[index]
+            for name, index in self._priorities.items():
+                stats[name.lower()] = counters[index]
+            stats['last_minute'] = minutes[-1]
+            stats['last_hour'] = sum(minutes)
+            stats['last_24h'] = sum(self._series(HOURS_OFFSET, HOUR_BUCKETS, 3600, now))
+            return stats
+        return self._consistent(read)
+
+    def timeline(self, now=None):
+        now = time.time() if now is None else now
+        return self._consistent(lambda: {
+            'per_minute': self._series(MINUTES_OFFSET, MINUTE_BUCKETS, 60, now),
+            'per_hour': self._series(HOURS_OFFSET, HOUR_BUCKETS, 3600, now),
+        })
+
+
+def open_shared(path=None, capacity=DEFAULT_CAPACITY):
+    """(historique, statistiques) partagés par tous les processus ouvrant le même fichier"""
+    segment = SharedSegment(path, capacity)
+    return SharedHistoryStore(segment), SharedStats(segment)
+
+
+# ========== TEST ==========
+def _worker(path, capacity, n, worker_id):
+    history, stats = open_shared(path, capacity)
+    for i in range(n):
+        alert_type = ALERT_TYPES[i % len(ALERT_TYPES)]
+        history.append(alert_type, f"Worker {worker_id} message {i}", PRIORITIES[i % len(PRIORITIES)], "🚨")
+        stats.record(alert_type, PRIORITIES[i % len(PRIORITIES)])
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    import sys
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_worker = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    path = os.path.join(tempfile.gettempdir(), f"shm-test-{os.getpid()}.shm")
+    print(f"=== TEST DE LA MÉMOIRE PARTAGÉE ({workers} processus x {per_worker} ajouts) ===")
+    history, stats = open_shared(path, capacity=1000)
+    start = time.perf_counter()
+    processes = [multiprocessing.Process(target=_worker, args=(path, 1000, per_worker, w))
+                 for w in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    print(f"   {workers * per_worker} ajouts en {elapsed:.2f} s "
+          f"({workers * per_worker / elapsed:,.0f}/s), version {history.version}, total {stats.total}")
+    print(f"   Cohérence : ids contigus = {[r.id for r in history.latest(1000)] == list(range(history.version - 999, history.version + 1))}, "
+          f"par type = {sum(stats.snapshot()[t.lower()] for t in ALERT_TYPES)}")
+    start = time.perf_counter()
+    for _ in range(10000):
+        history.latest(10)
+    print(f"   latest(10) : {(time.perf_counter() - start) * 100:.1f} µs, snapshot : {stats.snapshot()['last_hour']} dans l'heure")
+    history.segment.close()
+    os.remove(path)
@@ -0,0 +1,141 @@
+"""
+Agrégateur de statistiques incrémental pour le dashboard
+Les compteurs sont mis à jour à chaque envoi : la lecture est en O(1)
+"""
+
+import threading
+import time
+
+# Types et priorités connus (les autres sont comptés à la volée)
+ALERT_TYPES = ("SECURITY", "WEATHER", "HEALTH", "ACADEMIC")
+PRIORITIES = ("URGENT", "HIGH", "MEDIUM", "LOW")
+
+
+class RollingCounter:
+    """
+    Compteur glissant découpé en buckets de taille fixe (ex: 60 x 1 minute)
+    Chaque bucket retient son époque pour être remis à zéro paresseusement
+    """
+    def __init__(self, bucket_seconds, size):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self._counts = [0] * size
+        self._epochs = [-1] * size
+        self._total = 0
+        self._last_epoch = -1
+
+    def _expire(self, epoch):
+        """Retire les buckets sortis de la fenêtre depuis le dernier passage"""
+        if self._last_epoch < 0:
+            self._last_epoch = epoch
+            return
+        # Au plus `size` buckets à nettoyer, même après une longue pause
+        start = max(self._last_epoch + 1, epoch - self.size + 1)
+        for e in range(start, epoch + 1):
+            i = e % self.size
+            if self._epochs[i] != e:
+                self._total -= self._counts[i]
+                self._counts[i] = 0
+                self._epochs[i] = e
+        self._last_epoch = max(self._last_epoch, epoch)
+
+    def add(self, now, n=1):
+        epoch = int(now // self.bucket_seconds)
+        if self._last_epoch >= 0 and epoch <= self._last_epoch - self.size:
+            return  # Trop ancien pour la fenêtre
+        self._expire(epoch)
+        i = epoch % self.size
+        if self._epochs[i] != epoch:
+            self._total -= self._counts[i]
+            self._counts[i] = 0
+            self._epochs[i] = epoch
+        self._counts[i] += n
+        self._total += n
+
+    def total(self, now):
+        """Nombre d'événements dans la fenêtre"""
+        self._expire(int(now // self.bucket_seconds))
+        return self._total
+
+    def series(self, now):
+        """Valeurs des buckets, du plus ancien au plus récent"""
+        epoch = int(now // self.bucket_seconds)
+        self._expire(epoch)
+        values = []
+        for e in range(epoch - self.size + 1, epoch + 1):
+            i = e % self.size
+            values.append(self._counts[i] if self._epochs[i] == e else 0)
+        return values
+
+
+class StatsAggregator:
+    """
+    Statistiques des notifications tenues à jour à l'enregistrement
+    - compteurs par type et par priorité
+    - fenêtres glissantes par minute (dernière heure) et par heure (dernières 24h)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.by_type = dict.fromkeys(ALERT_TYPES, 0)
+        self.by_priority = dict.fromkeys(PRIORITIES, 0)
+        self.per_minute = RollingCounter(60, 60)
+        self.per_hour = RollingCounter(3600, 24)
+
+    def record(self, alert_type, priority, timestamp=None, count=1):
+        """Enregistre `count` notifications envoyées (un job entier en une fois)"""
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self.total += count
+            self.by_type[alert_type] = self.by_type.get(alert_type, 0) + count
+            self.by_priority[priority] = self.by_priority.get(priority, 0) + count
+            self.per_minute.add(now, count)
+            self.per_hour.add(now, count)
+
+    def restore(self, counts):
+        """
+        Réamorce les compteurs depuis des totaux (type, priorité, nombre)
+        ex: au démarrage, depuis l'historique persistant
+        """
+        with self._lock:
+            for alert_type, priority, count in counts:
+                self.total += count
+                self.by_type[alert_type] = self.by_type.get(alert_type, 0) + count
+                self.by_priority[priority] = self.by_priority.get(priority, 0) + count
+
+    def snapshot(self, now=None):
+        """
+        Retourne les statistiques sous forme de dictionnaire
+        Les clés historiques du dashboard (security, urgent, ...) sont conservées
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            stats = {'total': self.total}
+            for alert_type, count in self.by_type.items():
+                stats[alert_type.lower()] = count
+            for level, count in self.by_priority.items():
+                stats[level.lower()] = count
+            stats['last_minute'] = self.per_minute.series(now)[-1]
+            stats['last_hour'] = self.per_minute.total(now)
+            stats['last_24h'] = self.per_hour.total(now)
+            return stats
+
+    def timeline(self, now=None):
+        """Séries glissantes pour les graphiques (par minute et par heure)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return {
+                'per_minute': self.per_minute.series(now),
+                'per_hour': self.per_hour.series(now),
+            }
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    print("=== TEST DE L'AGRÉGATEUR ===")
+    stats = StatsAggregator()
+    start = time.time()
+    for i in range(1000):
+        stats.record(ALERT_TYPES[i % 4], PRIORITIES[i % 4], start + i)
+    print(f"   Snapshot: {stats.snapshot(start + 1000)}")
+    print(f"   Dernières minutes: {stats.timeline(start + 1000)['per_minute'][-5:]}")
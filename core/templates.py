@@ -0,0 +1,162 @@
+"""
+Gabarits de messages précompilés, par canal et par langue
+Chaque type d'alerte déclare ses gabarits (attribut de classe `templates`) ;
+NotificationMeta les compile une seule fois, à la définition de la classe.
+Un envoi rend chaque canal une seule fois : le texte est partagé par tous les
+morceaux de destinataires. Les champs propres au destinataire ({recipient})
+restent dans un gabarit partiellement rendu, complété à la livraison
+"""
+
+import os
+import string
+
+FALLBACK_LOCALE = "fr"  # Langue des textes d'origine, toujours déclarée
+DEFAULT_LOCALE = os.environ.get("NOTIFICATION_LOCALE", FALLBACK_LOCALE)
+ALERT_FIELDS = ("message", "icon", "label", "priority")
+RECIPIENT_FIELDS = ("recipient",)
+
+_FORMATTER = string.Formatter()
+
+
+class MessageTemplate:
+    """
+    Gabarit analysé une fois : textes fixes et champs en alternance
+    (literals[0], fields[0], literals[1], ...) ; pas de format ni de conversion
+    """
+    __slots__ = ('literals', 'fields')
+
+    def __init__(self, source=None, literals=None, fields=None):
+        if source is None:
+            self.literals, self.fields = tuple(literals), tuple(fields)
+            return
+        try:
+            parsed = list(_FORMATTER.parse(source))
+        except ValueError as e:
+            raise ValueError(f"Gabarit invalide {source!r}: {e}") from None
+        parsed_literals, parsed_fields = [""], []
+        for literal, field, spec, conversion in parsed:
+            parsed_literals[-1] += literal
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"Champ invalide {{{field}}} dans {source!r}")
+            parsed_fields.append(field)
+            parsed_literals.append("")
+        self.literals, self.fields = tuple(parsed_literals), tuple(parsed_fields)
+
+    def render(self, **values):
+        """Texte final ; ValueError si un champ manque"""
+        parts = [self.literals[0]]
+        try:
+            for field, literal in zip(self.fields, self.literals[1:]):
+                parts.append(str(values[field]))
+                parts.append(literal)
+        except KeyError as e:
+            raise ValueError(f"Champ manquant {e} pour {self}") from None
+        return "".join(parts)
+
+    def bind(self, **values):
+        """
+        Substitue les champs connus : retourne le texte si tout est rendu,
+        sinon un gabarit réduit aux champs restants (ex: {recipient})
+        """
+        literals, fields = [self.literals[0]], []
+        for field, literal in zip(self.fields, self.literals[1:]):
+            if field in values:
+                literals[-1] += str(values[field]) + literal
+            else:
+                fields.append(field)
+                literals.append(literal)
+        if not fields:
+            return literals[0]
+        return MessageTemplate(literals=literals, fields=fields)
+
+    def __str__(self):
+        parts = [_escape(self.literals[0])]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(f"{{{field}}}{_escape(literal)}")
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"MessageTemplate({str(self)!r})"
+
+
+def concat(pieces):
+    """Textes et gabarits partiels mis bout à bout : texte, ou gabarit si des champs restent"""
+    literals, fields = [""], []
+    for piece in pieces:
+        if isinstance(piece, MessageTemplate):
+            literals[-1] += piece.literals[0]
+            fields.extend(piece.fields)
+            literals.extend(piece.literals[1:])
+        else:
+            literals[-1] += piece
+    if not fields:
+        return literals[0]
+    return MessageTemplate(literals=literals, fields=fields)
+
+
+def _escape(literal):
+    return literal.replace("{", "{{").replace("}", "}}")
+
+
+class TemplateSet:
+    """Gabarits compilés d'un type d'alerte : canal -> langue -> MessageTemplate"""
+    __slots__ = ('channels',)
+
+    def __init__(self, channels):
+        self.channels = channels
+
+    def get(self, channel, locale=None):
+        """Gabarit de la langue demandée (DEFAULT_LOCALE si None), sinon celui de FALLBACK_LOCALE"""
+        variants = self.channels[channel]
+        return variants.get(locale or DEFAULT_LOCALE) or variants[FALLBACK_LOCALE]
+
+    def locales(self):
+        return sorted({locale for variants in self.channels.values() for locale in variants})
+
+
+def compile_templates(declared, channels=(), allowed=ALERT_FIELDS + RECIPIENT_FIELDS):
+    """
+    {canal: {langue: source}} (ou {canal: source} pour FALLBACK_LOCALE) -> TemplateSet
+    TypeError dès la définition de la classe si un canal, une langue ou un champ manque
+    """
+    compiled = {}
+    for channel, variants in declared.items():
+        if isinstance(variants, str):
+            variants = {FALLBACK_LOCALE: variants}
+        if FALLBACK_LOCALE not in variants:
+            raise TypeError(f"Gabarit {channel}: la langue {FALLBACK_LOCALE!r} est obligatoire")
+        compiled[channel] = {}
+        for locale, source in variants.items():
+            template = MessageTemplate(source)
+            unknown = set(template.fields) - set(allowed)
+            if unknown:
+                raise TypeError(f"Gabarit {channel}/{locale}: champs inconnus {', '.join(sorted(unknown))}")
+            compiled[channel][locale] = template
+    missing = set(channels) - set(compiled)
+    if missing:
+        raise TypeError(f"Gabarits manquants pour les canaux: {', '.join(sorted(missing))}")
+    return TemplateSet(compiled)
+
+
+# ========== TEST ==========
+if __name__ == "__main__":
+    import timeit
+
+    print("=== TEST DES GABARITS ===")
+    templates = compile_templates({
+        "email": {"fr": "Alerte {label} : {message} ({recipient})", "en": "{label} alert: {message} ({recipient})"},
+    }, channels=("email",))
+    bound = templates.get("email", "en").bind(message="Building A evacuation", label="Security")
+    print(f"   Rendu une fois par envoi : {bound!r}")
+    print(f"   Par destinataire : {bound.render(recipient='alice@campus.edu')}")
+    print(f"   Langue absente -> {FALLBACK_LOCALE} : {templates.get('email', 'de').bind(message='x', label='y')!r}")
+
+    recipients = [f"user{i}@campus.edu" for i in range(500)]
+    per_recipient = timeit.timeit(lambda: [templates.get("email").render(
+        message="Évacuation", label="Sécurité", recipient=r) for r in recipients], number=100)
+    once = timeit.timeit(lambda: [b.render(recipient=r) for b in [templates.get("email").bind(
+        message="Évacuation", label="Sécurité")] for r in recipients], number=100)
+    print(f"   500 destinataires : tout rendre {per_recipient * 10:.2f} ms, "
+          f"lier une fois puis {{recipient}} {once * 10:.2f} ms")
@@ -0,0 +1,379 @@
+"""
+Envois programmés (send_at / delay)
+Les échéances sont rangées dans une roue temporelle hiérarchique (timer wheel) :
+4 niveaux de 256/64/64/64 cases, de la seconde à ~2 ans. Un tick ne lit que la case
+courante du premier niveau ; une case d'un niveau supérieur n'est redistribuée
+qu'une fois par tour du niveau inférieur (une entrée descend au plus 3 fois).
+Le coût d'un tick suit donc le nombre d'envois échus, pas le nombre d'envois
+en attente (un million ou dix)
+Chaque envoi est persisté dans SQLite : la roue est reconstruite au redémarrage
+Plusieurs workers peuvent partager le même fichier : un envoi échu n'est transmis
+que par le process qui le réclame (claim) dans le store, les autres l'ignorent
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+import uuid
+
+from core.logs import get_logger
+
+logger = get_logger("timers")
+
+SCHEDULED, DISPATCHING, DISPATCHED = "scheduled", "dispatching", "dispatched"
+CANCELLED, FAILED = "cancelled", "failed"
+CLAIM_TIMEOUT = 60.0  # Secondes : un envoi réclamé mais jamais transmis (process arrêté) est repris
+
+
+class TimerWheel:
+    """
+    add(id, due, item) / cancel(id) en O(1) ; advance(now) -> [(id, item)] échus
+    Le niveau L compte en unités de granularity[L] ticks (1, 256, 16384, ...)
+    """
+    def __init__(self, tick=1.0, slots=(256, 64, 64, 64), now=None):
+        self.tick = tick
+        self.slots = slots
+        self.granularity = [math.prod(slots[:level]) for level in range(len(slots))]
+        self.horizon = self.granularity[-1] * slots[-1]  # En ticks
+        self.levels = [[{} for _ in range(size)] for size in slots]
+        self.current = self._tick_of(time.time() if now is None else now)  # Prochain tick à traiter
+        self._where = {}  # id -> case (dict) qui le contient
+
+    def _tick_of(self, timestamp):
+        return math.ceil(timestamp / self.tick)  # Jamais en avance sur l'échéance
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._where
+
+    def add(self, entry_id, due, item):
+        """ValueError si l'échéance dépasse l'horizon de la roue"""
+        target = max(self._tick_of(due), self.current)
+        if target - self.current >= self.horizon:
+            raise ValueError(f"Échéance au-delà de {self.horizon * self.tick / 86400:.0f} jours")
+        self._place(entry_id, target, item)
+
+    def _place(self, entry_id, target, item):
+        delta = target - self.current
+        for level, size in enumerate(self.slots):
+            granularity = self.granularity[level]
+            if delta < granularity * size or level == len(self.slots) - 1:
+                slot = self.levels[level][(target // granularity) % size]
+                slot[entry_id] = (target, item)
+                self._where[entry_id] = slot
+                return
+
+    def cancel(self, entry_id):
+        """True si l'entrée était en attente"""
+        slot = self._where.pop(entry_id, None)
+        if slot is None:
+            return False
+        del slot[entry_id]
+        return True
+
+    def advance(self, now):
+        """Traite les ticks jusqu'à `now` et retourne les entrées échues"""
+        last = math.floor(now / self.tick)
+        if not self._where:
+            self.current = max(self.current, last + 1)  # Roue vide : rien à parcourir
+            return []
+        due = []
+        while self.current <= last and self._where:
+            self._cascade()
+            index = self.current % self.slots[0]
+            slot = self.levels[0][index]
+            if slot:
+                self.levels[0][index] = {}
+                for entry_id, (_, item) in slot.items():
+                    del self._where[entry_id]
+                    due.append((entry_id, item))
+            self.current += 1
+        self.current = max(self.current, last + 1)
+        return due
+
+    def _cascade(self):
+        """Début d'un tour : la case correspondante des niveaux supérieurs descend d'un cran"""
+        for level in range(len(self.slots) - 1, 0, -1):
+            granularity = self.granularity[level]
+            if self.current % granularity:
+                continue
+            index = (self.current // granularity) % self.slots[level]
+            slot = self.levels[level][index]
+            if slot:
+                self.levels[level][index] = {}
+                for entry_id, (target, item) in slot.items():
+                    self._place(entry_id, target, item)
+
+
+class SQLiteScheduleStore:
+    """
+    Envois programmés persistés (SCHEDULE_DB) ; ':memory:' pour ne rien conserver
+    Chaque changement d'état est conditionné à l'état attendu (UPDATE ... WHERE status = ?) :
+    le nombre de lignes modifiées dit si ce process a gagné (réclamation, annulation)
+    """
+    def __init__(self, path=":memory:", claim_timeout=CLAIM_TIMEOUT):
+        self.path = path
+        self.claim_timeout = claim_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS scheduled (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    due_at REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    job_id TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(scheduled)")}
+            if 'attempts' not in columns:  # Fichier créé avant le suivi des tentatives
+                self._conn.execute("ALTER TABLE scheduled ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_scheduled_status ON scheduled (status, due_at)")
+            self._conn.commit()
+
+    def add(self, entry_id, payload, due_at):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO scheduled (id, payload, due_at, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (entry_id, json.dumps(payload), due_at, SCHEDULED, now, now))
+            self._conn.commit()
+
+    def claim(self, entry_ids):
+        """
+        Réserve les envois échus pour ce process (SCHEDULED -> DISPATCHING) et retourne
+        ceux obtenus : les autres sont partis, annulés ou réclamés par un autre worker
+        """
+        now = time.time()
+        claimed = []
+        with self._lock:
+            for entry_id in entry_ids:
+                cursor = self._conn.execute(
+                    "UPDATE scheduled SET status = ?, updated_at = ? "
+                    "WHERE id = ? AND (status = ? OR (status = ? AND updated_at < ?))",
+                    (DISPATCHING, now, entry_id, SCHEDULED, DISPATCHING, now - self.claim_timeout))
+                if cursor.rowcount:
+                    claimed.append(entry_id)
+            self._conn.commit()
+        return claimed
+
+    def finish(self, changes):
+        """changes : [(id, job_id)] réclamés puis transmis, passés à DISPATCHED en une transaction"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE scheduled SET status = ?, job_id = ?, updated_at = ? WHERE id = ? AND status = ?",
+                [(DISPATCHED, job_id, now, entry_id, DISPATCHING) for entry_id, job_id in changes]
+            )
+            self._conn.commit()
+
+    def release(self, entry_ids, delay, max_attempts):
+        """
+        Envois réclamés mais non transmis : reprogrammés dans delay * 2^tentatives secondes,
+        ou FAILED après max_attempts tentatives ; retourne {id: nouvelle échéance} des reprogrammés
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE scheduled SET attempts = attempts + 1, updated_at = ?, due_at = ? + ? * (1 << attempts), "
+                "status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END WHERE id = ? AND status = ?",
+                [(now, now, delay, max_attempts, FAILED, SCHEDULED, entry_id, DISPATCHING) for entry_id in entry_ids]
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                f"SELECT id, due_at FROM scheduled WHERE status = ? AND id IN ({','.join('?' * len(entry_ids))})",
+                (SCHEDULED, *entry_ids)).fetchall()
+        return dict(rows)
+
+    def cancel(self, entry_id):
+        """True si l'envoi était encore programmé (quel que soit le worker qui le détient)"""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE scheduled SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                                        (CANCELLED, time.time(), entry_id, SCHEDULED))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get(self, entry_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {COLUMNS} FROM scheduled WHERE id = ?", (entry_id,)).fetchone()
+        return _to_dict(row) if row else None
+
+    def pending(self):
+        """Envois non encore partis (reprise au démarrage), réclamations abandonnées comprises"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, due_at FROM scheduled WHERE status = ? OR (status = ? AND updated_at < ?)",
+                (SCHEDULED, DISPATCHING, time.time() - self.claim_timeout)).fetchall()
+        return [(entry_id, json.loads(payload), due_at) for entry_id, payload, due_at in rows]
+
+
+COLUMNS = "id, payload, due_at, status, job_id, attempts, created_at, updated_at"
+
+
+def _to_dict(row):
+    entry_id, payload, due_at, status, job_id, attempts, created_at, updated_at = row
+    return {
+        'id': entry_id,
+        'status': status,
+        'payload': json.loads(payload),
+        'due_at': due_at,
+        'job_id': job_id,
+        'attempts': attempts,
+        'created_at': created_at,
+        'updated_at': updated_at,
+    }
+
+
+class SendScheduler:
+    """
+    schedule(payload, due_at) -> id ; cancel(id) ; get(id)
+    Un thread avance la roue à chaque tick et passe tous les envois échus
+    en un seul appel à dispatch([(id, payload)]) -> {id: job_id}
+    Seuls les envois réclamés dans le store sont transmis ; ceux absents de la réponse
+    de dispatch sont reprogrammés avec backoff (retry_delay, doublé à chaque tentative)
+    puis marqués FAILED après max_attempts
+    Reprise : les envois en attente dans le store sont remis dans la roue
+    (ceux dont l'échéance est passée partent au premier tick)
+    """
+    def __init__(self, dispatch, store=None, tick=1.0, retry_delay=30.0, max_attempts=5):
+        self.dispatch = dispatch
+        self.store = store or SQLiteScheduleStore(":memory:")
+        self.wheel = TimerWheel(tick)
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self.scheduled = 0
+        self.dispatched = 0
+        self.cancelled = 0
+        self.retried = 0
+        self.failed = 0
+        restored = self.store.pending()
+        for entry_id, payload, due_at in restored:
+            self.wheel.add(entry_id, due_at, payload)
+        if restored:
+            logger.info("[PROGRAMMÉS] %d envois repris", len(restored))
+        self._thread = threading.Thread(target=self._run, name="send-scheduler", daemon=True)
+        self._thread.start()
+
+    def schedule(self, payload, due_at):
+        """ValueError si l'échéance est au-delà de l'horizon"""
+        entry_id = uuid.uuid4().hex
+        with self._cond:
+            if not len(self.wheel):
+                self.wheel.advance(time.time())  # Roue restée vide (thread en attente) : remise à l'heure
+            self.wheel.add(entry_id, due_at, payload)
+            try:
+                self.store.add(entry_id, payload, due_at)
+            except Exception:
+                self.wheel.cancel(entry_id)
+                raise
+            self.scheduled += 1
+            self._cond.notify()
+        return entry_id
+
+    def cancel(self, entry_id):
+        """
+        True si l'envoi était encore en attente (False : parti, annulé ou inconnu)
+        L'annulation passe par le store : valable aussi pour un envoi programmé par un autre worker
+        """
+        if not self.store.cancel(entry_id):
+            return False
+        with self._cond:
+            self.wheel.cancel(entry_id)  # Absent si programmé ailleurs : ignoré à l'échéance
+            self.cancelled += 1
+        return True
+
+    def get(self, entry_id):
+        return self.store.get(entry_id)
+
+    def _run(self):
+        tick = self.wheel.tick
+        while True:
+            with self._cond:
+                if not len(self.wheel):
+                    self._cond.wait()  # Roue vide : réveillé par schedule()
+                    continue
+                now = time.time()
+                self._cond.wait(tick - now % tick)  # Jusqu'au début du tick suivant
+                due = self.wheel.advance(time.time())
+            if due:
+                self._dispatch(due)
+
+    def _dispatch(self, due):
+        claimed = set(self.store.claim([entry_id for entry_id, _ in due]))
+        due = [(entry_id, payload) for entry_id, payload in due if entry_id in claimed]
+        if not due:
+            return
+        try:
+            job_ids = self.dispatch(due)
+        except Exception as e:
+            logger.error("[PROGRAMMÉS] %d envois échus non transmis: %s", len(due), e)
+            job_ids = {}
+        # Après dispatch : un arrêt entre les deux renverrait l'envoi après CLAIM_TIMEOUT (au moins une fois)
+        sent = [(entry_id, job_ids[entry_id]) for entry_id, _ in due if entry_id in job_ids]
+        unsent = [entry_id for entry_id, _ in due if entry_id not in job_ids]
+        self.store.finish(sent)
+        retries = self.store.release(unsent, self.retry_delay, self.max_attempts) if unsent else {}
+        if unsent:
+            logger.warning("[PROGRAMMÉS] %d envois non transmis : %d reprogrammés, %d en échec",
+                           len(unsent), len(retries), len(unsent) - len(retries))
+        payloads = dict(due)
+        with self._cond:
+            for entry_id, due_at in retries.items():
+                self.wheel.add(entry_id, due_at, payloads[entry_id])
+            self.dispatched += len(sent)
+            self.retried += len(retries)
+            self.failed += len(unsent) - len(retries)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'pending': len(self.wheel),
+                'scheduled': self.scheduled,
+                'dispatched': self.dispatched,
+                'cancelled': self.cancelled,
+                'retried': self.retried,
+                'failed': self.failed,
+                'horizon_days': round(self.wheel.horizon * self.wheel.tick / 86400),
+            }
+
+
+# ========== BENCHMARK ==========
+if __name__ == "__main__":
+    import random
+
+    print("=== TEST DE LA ROUE TEMPORELLE ===")
+    start = 1_800_000_000.0
+    wheel = TimerWheel(now=start)
+    pending = 1_000_000
+    t0 = time.perf_counter()
+    for i in range(pending):
+        wheel.add(i, start + random.uniform(0, 30 * 86400), i)  # Sur 30 jours
+    print(f"   {pending:,} ajouts : {(time.perf_counter() - t0) * 1e6 / pending:.2f} µs/ajout")
+
+    burst = 5000
+    for i in range(burst):  # Beaucoup d'envois échus au même tick (07:30)
+        wheel.add(f"exam-{i}", start + 3600.5, i)
+    ticks = 2 * 3600
+    t0 = time.perf_counter()
+    due_total, worst, worst_due = 0, 0.0, 0
+    for second in range(1, ticks + 1):
+        t1 = time.perf_counter()
+        due = wheel.advance(start + second)
+        elapsed = time.perf_counter() - t1
+        due_total += len(due)
+        if elapsed > worst:
+            worst, worst_due = elapsed, len(due)
+    total = time.perf_counter() - t0
+    print(f"   {ticks} ticks avec {len(wheel) + due_total:,} en attente : "
+          f"{total * 1e6 / ticks:.1f} µs/tick en moyenne, pire {worst * 1000:.2f} ms ({worst_due} échus)")
+    print(f"   {due_total:,} échus, {len(wheel):,} restants, annulation : {wheel.cancel(next(iter(wheel._where)))}")
@@ -0,0 +1,285 @@
+"""
+Persistance de l'historique des notifications (SQLite via Flask-SQLAlchemy)
+Écritures groupées par un thread (group commit), lectures par requêtes indexées
+Les ids sont attribués à l'ajout (pas par SQLite), par blocs réservés dans la base :
+l'enregistrement publié en direct a déjà son id définitif, utilisable comme curseur
+de pagination, et les ids restent sous 2^53 (exacts en JavaScript)
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, event, func, insert, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from core.history import NotificationRecord
+from core.logs import get_logger
+
+logger = get_logger("models")
+
+db = SQLAlchemy()
+
+
+@event.listens_for(Engine, "connect")
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL : les lectures ne bloquent pas l'écrivain (et inversement)"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+class Notification(db.Model):
+    """Une notification envoyée"""
+    __tablename__ = 'notifications'
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(20), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    priority = db.Column(db.String(10), nullable=False)
+    icon = db.Column(db.String(8), nullable=False, default="")
+    result = db.Column(db.String(200), nullable=False, default="")
+    created_at = db.Column(db.Float, nullable=False, index=True)  # Timestamp epoch
+
+    __table_args__ = (
+        db.Index('ix_notifications_type_created_at', 'type', 'created_at'),
+        db.Index('ix_notifications_priority_created_at', 'priority', 'created_at'),
+    )
+
+
+class HistoryCounter(db.Model):
+    """
+    Compteur partagé par tous les workers : 'next_id' (prochain id libre),
+    'version' (lignes validées, sert d'ETag aux pages quel que soit le worker servi)
+    """
+    __tablename__ = 'history_counters'
+
+    name = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.Integer, nullable=False)
+
+
+class IdSequence:
+    """
+    Ids uniques entre processus : chaque processus réserve un bloc de block_size ids
+    dans history_counters (UPDATE + SELECT dans une transaction, sérialisée par la base)
+    puis les distribue sans accès à la base. Croissants dans un processus ; entre workers,
+    l'ordre chronologique est donné par (created_at, id)
+    """
+    def __init__(self, engine, block_size=1000):
+        self.engine = engine
+        self.block_size = block_size
+        self._counters = HistoryCounter.__table__
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+
+    def _reserve(self):
+        counters = self._counters
+        with self.engine.begin() as conn:
+            conn.execute(update(counters).where(counters.c.name == 'next_id')
+                         .values(value=counters.c.value + self.block_size))
+            end = conn.execute(select(counters.c.value).where(counters.c.name == 'next_id')).scalar()
+        return end - self.block_size, end
+
+    def next(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve()
+            self._next += 1
+            return self._next - 1
+
+
+class SQLHistoryStore:
+    """
+    Historique persistant, même interface que core.history.HistoryStore
+    append() met en file ; un thread écrit les lots en une transaction
+    (jusqu'à batch_size lignes, ou ce qui arrive en flush_interval)
+    Un lot en échec est réessayé (max_attempts, backoff) ; au-delà il est conservé
+    dans failed_batches (les plus anciens sont oubliés) et compté dans `failed`
+    Un lot refusé par une contrainte (IntegrityError) est réécrit ligne par ligne :
+    seules les lignes fautives sont écartées
+    """
+    def __init__(self, app, batch_size=500, flush_interval=0.05, max_attempts=5, retry_delay=0.1):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        with app.app_context():
+            db.create_all()
+            self.engine = db.engine
+        self._table = Notification.__table__
+        self._counters = HistoryCounter.__table__
+        self._init_counters()
+        self._ids = IdSequence(self.engine)
+        self._queue = queue.Queue()
+        self._count = 0
+        self.failed = 0  # Lignes abandonnées après max_attempts
+        self.failed_batches = deque(maxlen=100)  # (date, lignes, erreur)
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, alert_type, message, priority, icon, result="", created_at=None):
+        created_at = time.time() if created_at is None else created_at
+        record = NotificationRecord(self._ids.next(), alert_type, message, priority, icon, created_at, result)
+        self._queue.put({
+            'id': record.id, 'type': record.type, 'message': message, 'priority': record.priority,
+            'icon': record.icon, 'result': record.result, 'created_at': created_at,
+        })
+        self._count += 1
+        return record
+
+    def flush(self):
+        """Attend que toutes les écritures en file soient validées"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(rows)
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _init_counters(self):
+        """Compteurs créés d'après les lignes existantes (sans effet s'ils existent déjà)"""
+        t, counters = self._table, self._counters
+        try:
+            with self.engine.begin() as conn:
+                existing = {name for name, in conn.execute(select(counters.c.name))}
+                if 'next_id' not in existing:
+                    start = (conn.execute(select(func.max(t.c.id))).scalar() or 0) + 1
+                    conn.execute(insert(counters), [{'name': 'next_id', 'value': start}])
+                if 'version' not in existing:
+                    rows = conn.execute(select(func.count()).select_from(t)).scalar()
+                    conn.execute(insert(counters), [{'name': 'version', 'value': rows}])
+        except IntegrityError:
+            pass  # Créés au même moment par un autre worker
+
+    def _insert(self, rows):
+        """Lignes et version dans la même transaction : une page rendue à cette version les contient"""
+        counters = self._counters
+        with self.engine.begin() as conn:
+            conn.execute(insert(self._table), rows)
+            conn.execute(update(counters).where(counters.c.name == 'version')
+                         .values(value=counters.c.value + len(rows)))
+
+    def _write(self, rows):
+        """Une transaction pour tout le lot, réessayée avec backoff avant abandon"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._insert(rows)
+                return
+            except IntegrityError as e:
+                logger.warning("[HISTORIQUE] Lot de %d notifications refusé (%s) : écriture ligne par ligne",
+                               len(rows), e.orig)
+                self._write_each(rows)
+                return
+            except Exception as e:
+                error = e
+                logger.warning("[HISTORIQUE] Échec d'écriture de %d notifications (%d/%d): %s",
+                               len(rows), attempt, self.max_attempts, e)
+                if attempt < self.max_attempts:
+                    time.sleep(self.retry_delay * 2 ** (attempt - 1))
+        self._fail(rows, error)
+
+    def _write_each(self, rows):
+        for row in rows:
+            try:
+                self._insert([row])
+            except Exception as e:
+                self._fail([row], e)
+
+    def _fail(self, rows, error):
+        self.failed += len(rows)
+        self.failed_batches.append((time.time(), rows, str(error)))
+        logger.error("[HISTORIQUE] %d notifications non enregistrées: %s", len(rows), getattr(error, 'orig', error))
+
+    @staticmethod
+    def _record(row):
+        return NotificationRecord(row.id, row.type, row.message, row.priority,
+                                  row.icon, row.created_at, row.result)
+
+    def latest(self, n):
+        """Les n dernières notifications (plus ancienne en premier), via ORDER BY created_at DESC LIMIT n"""
+        t = self._table
+        query = select(t).order_by(t.c.created_at.desc(), t.c.id.desc()).limit(n)
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+        return [self._record(row) for row in reversed(rows)]
+
+    def query(self, alert_type=None, priority=None, since=None, until=None, before=None, limit=50):
+        """
+        Générateur des notifications filtrées, de la plus récente à la plus ancienne
+        Pagination par clé sur (created_at, id) : WHERE (created_at, id) < curseur,
+        servie par les index (type|priority, created_at) ; les lignes sont lues en flux
+        """
+        t = self._table
+        conditions = []
+        if alert_type is not None:
+            conditions.append(t.c.type == alert_type)
+        if priority is not None:
+            conditions.append(t.c.priority == priority)
+        if since is not None:
+            conditions.append(t.c.created_at >= since)
+        if until is not None:
+            conditions.append(t.c.created_at < until)
+        if before is not None:
+            timestamp, record_id = before
+            conditions.append(or_(t.c.created_at < timestamp,
+                                  and_(t.c.created_at == timestamp, t.c.id < record_id)))
+        query = (select(t).where(*conditions)
+                 .order_by(t.c.created_at.desc(), t.c.id.desc()).limit(limit))
+        with self.engine.connect() as conn:
+            for row in conn.execution_options(stream_results=True).execute(query):
+                yield self._record(row)
+
+    def counts(self):
+        """Nombre de notifications par (type, priorité), pour réamorcer les statistiques"""
+        query = select(self._table.c.type, self._table.c.priority, func.count()).group_by(
+            self._table.c.type, self._table.c.priority)
+        with self.engine.connect() as conn:
+            return conn.execute(query).fetchall()
+
+    @property
+    def total_appended(self):
+        """Notifications ajoutées depuis le démarrage de ce processus"""
+        return self._count
+
+    @property
+    def version(self):
+        """
+        Change après chaque lot validé par n'importe quel worker (compteur dans la base) :
+        un worker ne répond pas 304 pour une page qu'un autre a déjà modifiée
+        """
+        counters = self._counters
+        with self.engine.connect() as conn:
+            return conn.execute(select(counters.c.value).where(counters.c.name == 'version')).scalar()
+
+    def __len__(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(self._table)).scalar()
+
+    def __iter__(self):
+        query = select(self._table).order_by(self._table.c.created_at, self._table.c.id)
+        with self.engine.connect() as conn:
+            for row in conn.execute(query):
+                yield self._record(row)
+
+    def memory_footprint(self):
+        """Seules les écritures en attente occupent de la mémoire"""
+        return self._queue.qsize() * 512  # Estimation par ligne en file
@@ -2,18 +2,25 @@
  * Module de graphiques pour le dashboard
  */
 
+const TYPE_KEYS = ['security', 'weather', 'health', 'academic'];
+const PRIORITY_KEYS = ['urgent', 'high', 'medium', 'low'];
+
 class NotificationCharts {
     constructor() {
         this.charts = {};
     }
     
     /**
-     * Initialise les graphiques
+     * Initialise les graphiques (vides) puis les remplit depuis /api/stats
+     * Ensuite, seuls les deltas du flux en direct sont appliqués (voir main.js)
      */
-    init() {
+    async init() {
         this.initTypeChart();
         this.initPriorityChart();
         this.initTimelineChart();
+        
+        const stats = await fetchStats();
+        if (stats) this.updateCharts(stats);
     }
     
     /**
@@ -28,7 +35,7 @@ class NotificationCharts {
             data: {
                 labels: ['Sécurité', 'Météo', 'Santé', 'Académique'],
                 datasets: [{
-                    data: [12, 19, 8, 15],
+                    data: [0, 0, 0, 0],
                     backgroundColor: [
                         '#e74c3c',
                         '#f39c12',
@@ -67,7 +74,7 @@ class NotificationCharts {
                 labels: ['Urgent', 'Haute', 'Moyenne', 'Basse'],
                 datasets: [{
                     label: 'Nombre de notifications',
-                    data: [5, 12, 25, 8],
+                    data: [0, 0, 0, 0],
                     backgroundColor: [
                         '#e74c3c',
                         '#3498db',
@@ -104,12 +111,12 @@ class NotificationCharts {
         const ctx = document.getElementById('timelineChart');
         if (!ctx) return;
         
+        // 24 buckets horaires, du plus ancien au plus récent (comme stats.per_hour)
         const now = new Date();
         const labels = [];
-        for (let i = 6; i >= 0; i--) {
-            const date = new Date(now);
-            date.setDate(date.getDate() - i);
-            labels.push(date.toLocaleDateString('fr-FR', { weekday: 'short' }));
+        for (let i = 23; i >= 0; i--) {
+            const date = new Date(now.getTime() - i * 3600 * 1000);
+            labels.push(`${date.getHours()}h`);
         }
         
         this.charts.timeline = new Chart(ctx, {
@@ -118,7 +125,7 @@ class NotificationCharts {
                 labels: labels,
                 datasets: [{
                     label: 'Notifications',
-                    data: [4, 8, 6, 12, 9, 7, 5],
+                    data: new Array(24).fill(0),
                     borderColor: '#3498db',
                     backgroundColor: 'rgba(52, 152, 219, 0.1)',
                     borderWidth: 2,
@@ -131,7 +138,7 @@ class NotificationCharts {
                 plugins: {
                     title: {
                         display: true,
-                        text: 'Activité sur 7 jours'
+                        text: 'Activité sur 24 heures'
                     }
                 },
                 scales: {
@@ -144,18 +151,43 @@ class NotificationCharts {
     }
     
     /**
-     * Met à jour tous les graphiques
+     * Met à jour tous les graphiques depuis une photo des statistiques
      */
     updateCharts(stats) {
-        if (this.charts.type && stats.typeData) {
-            this.charts.type.data.datasets[0].data = stats.typeData;
+        if (this.charts.type) {
+            this.charts.type.data.datasets[0].data = TYPE_KEYS.map(key => stats[key] || 0);
             this.charts.type.update();
         }
         
-        if (this.charts.priority && stats.priorityData) {
-            this.charts.priority.data.datasets[0].data = stats.priorityData;
+        if (this.charts.priority) {
+            this.charts.priority.data.datasets[0].data = PRIORITY_KEYS.map(key => stats[key] || 0);
             this.charts.priority.update();
         }
+        
+        if (this.charts.timeline && stats.per_hour) {
+            this.charts.timeline.data.datasets[0].data = stats.per_hour;
+            this.charts.timeline.update();
+        }
+    }
+    
+    /**
+     * Applique un delta reçu du flux en direct (sans recharger les données)
+     */
+    applyDelta(delta) {
+        const add = (chart, keys) => {
+            if (!chart) return;
+            const data = chart.data.datasets[0].data;
+            keys.forEach((key, i) => { data[i] += delta[key] || 0; });
+            chart.update('none');
+        };
+        add(this.charts.type, TYPE_KEYS);
+        add(this.charts.priority, PRIORITY_KEYS);
+        
+        if (this.charts.timeline && delta.total) {
+            const data = this.charts.timeline.data.datasets[0].data;
+            data[data.length - 1] += delta.total;  // Bucket de l'heure courante
+            this.charts.timeline.update('none');
+        }
     }
 }
 
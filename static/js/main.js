@@ -144,7 +144,7 @@ async function sendNotificationAPI(alertType, message) {
         const data = await response.json();
         
         if (response.ok) {
-            showNotification(`Notification envoyée: ${data.result}`, 'success');
+            showNotification(`Notification mise en file (job ${data.job_id})`, 'success');
             return data;
         } else {
             showNotification(`Erreur: ${data.error}`, 'danger');
@@ -169,6 +169,80 @@ async function fetchStats() {
     }
 }
 
+// ===== FLUX EN DIRECT (SSE) =====
+
+const LIVE_MAX_ITEMS = 10;
+const PRIORITY_COLORS = { URGENT: 'danger', HIGH: 'warning', MEDIUM: 'info', LOW: 'success' };
+
+/**
+ * Construit l'élément HTML d'une notification reçue en direct
+ */
+function renderNotificationItem(notif) {
+    const item = document.createElement('div');
+    item.className = `notification-item notification-${notif.type.toLowerCase()}`;
+    item.innerHTML = `
+        <div class="d-flex justify-content-between align-items-start">
+            <div>
+                <span class="badge badge-${notif.type.toLowerCase()} me-2"></span>
+                <small class="text-muted"></small>
+            </div>
+            <span class="badge bg-${PRIORITY_COLORS[notif.priority] || 'secondary'}"></span>
+        </div>
+        <p class="mt-2 mb-0"></p>
+    `;
+    // textContent : le message vient de l'utilisateur, pas d'injection HTML
+    item.querySelector('.badge').textContent = `${notif.icon} ${notif.type}`;
+    item.querySelector('small').textContent = new Date(notif.timestamp).toLocaleTimeString('fr-FR');
+    item.querySelector('.d-flex > .badge').textContent = notif.priority;
+    const message = notif.message.length > 80 ? `${notif.message.slice(0, 80)}...` : notif.message;
+    item.querySelector('p').textContent = message;
+    return item;
+}
+
+/**
+ * Abonne le dashboard à /api/stream : une photo des compteurs à la connexion,
+ * puis uniquement des deltas (aucun rechargement ni polling)
+ */
+function initLiveFeed() {
+    const counters = document.querySelectorAll('[data-stat]');
+    if (!counters.length || typeof EventSource === 'undefined') return;
+    
+    const status = document.getElementById('live-status');
+    const list = document.getElementById('live-notifications');
+    const source = new EventSource(`${API_BASE_URL}/api/stream`);
+    
+    source.addEventListener('snapshot', (e) => {
+        const stats = JSON.parse(e.data);
+        counters.forEach(el => {
+            el.textContent = stats[el.dataset.stat] || 0;
+        });
+        if (window.notificationCharts) window.notificationCharts.updateCharts(stats);
+    });
+    
+    source.addEventListener('stats', (e) => {
+        const delta = JSON.parse(e.data);
+        counters.forEach(el => {
+            const key = el.dataset.stat;
+            if (delta[key]) el.textContent = (parseInt(el.textContent, 10) || 0) + delta[key];
+        });
+        if (window.notificationCharts) window.notificationCharts.applyDelta(delta);
+    });
+    
+    source.addEventListener('notifications', (e) => {
+        if (!list) return;
+        JSON.parse(e.data).forEach(notif => list.insertBefore(renderNotificationItem(notif), list.firstChild));
+        while (list.children.length > LIVE_MAX_ITEMS) list.removeChild(list.lastChild);
+    });
+    
+    source.onopen = () => {
+        if (status) status.className = 'badge bg-success';
+    };
+    source.onerror = () => {
+        // EventSource se reconnecte seul et reçoit une nouvelle photo
+        if (status) status.className = 'badge bg-secondary';
+    };
+}
+
 // ===== ANIMATIONS ET EFFETS =====
 
 /**
@@ -244,13 +318,8 @@ function initApp() {
         });
     }
     
-    // Auto-refresh du dashboard toutes les 30 secondes
-    if (window.location.pathname.includes('/dashboard')) {
-        setInterval(() => {
-            console.log('🔄 Actualisation automatique du dashboard');
-            // Ici tu pourrais recharger les données
-        }, 30000);
-    }
+    // Mise à jour en direct du dashboard (Server-Sent Events)
+    initLiveFeed();
 }
 
 // ===== ÉVÉNEMENTS =====